@@ -7,12 +7,25 @@ sys.path.append(backend_dir)
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import emit, join_room, leave_room
 import logging
-from utils.detection_utils import load_model
+from utils.detection_utils import (
+    register_model, register_model_variants, get_model, is_model_loaded, load_violence_model, get_model_backend,
+    MODEL_VARIANTS
+)
 from routes.video_routes import video_bp
 from routes.image_routes import image_bp
 from config import Config
+from utils.uploads import StreamingUploadRequest
+from utils.realtime import socketio, job_room
+from utils.stream_ingest import stream_room
+from utils.enrichment import get_enricher
+from utils.alerts import get_alert_dispatcher
+from utils.incidents import get_incident_tracker
+from utils.result_cache import get_image_result_cache, get_video_result_cache
+from utils.storage import get_storage_janitor
+from utils.cpu_config import describe_topology
+from utils.inference_server import RemoteModel, load_authkey
 
 # Configure logging
 logging.basicConfig(
@@ -24,17 +37,34 @@ logger = logging.getLogger(__name__)
 def create_app():
     app = Flask(__name__)
     
+    # Stream multipart uploads: images to memory, videos straight into the upload folder
+    app.request_class = StreamingUploadRequest
+    
     # Configure CORS with more specific settings
     CORS(app, resources={
         r"/api/*": {
             "origins": "*",
             "methods": ["GET", "POST", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Range"],
-            "expose_headers": ["Content-Range", "Content-Length", "Content-Type"]
+            "allow_headers": ["Content-Type", "Range", "If-Range", "If-None-Match", "If-Modified-Since"],
+            "expose_headers": [
+                "Accept-Ranges", "Content-Range", "Content-Length", "Content-Type", "ETag", "Last-Modified"
+            ]
         }
     })
     
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    # With several workers, events emitted by one (job progress, alerts) reach
+    # clients connected to another only through a shared message queue
+    if Config.WEB_CONCURRENCY > 1 and not Config.SOCKETIO_MESSAGE_QUEUE:
+        logger.warning(
+            f"WEB_CONCURRENCY={Config.WEB_CONCURRENCY} without SOCKETIO_MESSAGE_QUEUE: "
+            "Socket.IO clients only receive events from the worker they are connected to"
+        )
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        async_mode='threading',
+        message_queue=Config.SOCKETIO_MESSAGE_QUEUE or None
+    )
 
     # Create necessary directories
     for folder in [Config.UPLOAD_FOLDER, 'processed_images', 'processed_videos']:
@@ -47,9 +77,21 @@ def create_app():
     app.config['ALLOWED_EXTENSIONS'] = Config.ALLOWED_EXTENSIONS
     app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH
 
-    # Load weapon detection model
-    weapon_model = load_model(Config.WEAPON_MODEL_PATH)
-    app.config['WEAPON_MODEL'] = weapon_model
+    # Register models once per process; they are shared by all blueprints
+    if Config.INFERENCE_MODE == 'remote':
+        # Weapon models live in the inference server; this worker only holds clients
+        addresses = [a.strip() for a in Config.INFERENCE_SERVER_ADDRESS.split(',') if a.strip()]
+        # Fails here, at startup, if no key is configured
+        authkey = load_authkey()
+        for name in MODEL_VARIANTS.values():
+            register_model(name, Config.WEAPON_MODEL_PATH,
+                           loader=lambda path, name=name: RemoteModel(addresses, name, authkey))
+    else:
+        register_model_variants()
+    register_model('violence', Config.VIOLENCE_MODEL_PATH, loader=load_violence_model)
+
+    # Load the weapon detection model up front, the violence model lazily
+    app.config['WEAPON_MODEL'] = get_model('weapon')
     logger.info("Weapon detection model loaded successfully")
 
     # Register blueprints with proper URL prefixes
@@ -59,7 +101,22 @@ def create_app():
 
     @app.route('/api/health', methods=['GET'])
     def health_check():
-        return {"status": "healthy", "model_loaded": "WEAPON_MODEL" in app.config}
+        return {
+            "status": "healthy",
+            "model_loaded": is_model_loaded('weapon'),
+            "int8_model_loaded": is_model_loaded('weapon_int8'),
+            "violence_model_loaded": is_model_loaded('violence'),
+            "inference_backend": get_model_backend(get_model('weapon')),
+            "weapon_cache": get_enricher().stats(),
+            "alerts": get_alert_dispatcher().stats(),
+            "incidents": get_incident_tracker().stats(),
+            "result_cache": {
+                "images": get_image_result_cache().stats(),
+                "videos": get_video_result_cache().stats()
+            },
+            "storage": get_storage_janitor().stats(),
+            "cpu": describe_topology()
+        }
 
     @socketio.on('connect')
     def handle_connect():
@@ -70,18 +127,50 @@ def create_app():
     def handle_disconnect():
         logger.info('Client disconnected')
 
+    @socketio.on('join_job')
+    def handle_join_job(data):
+        """Subscribe the client to progress events of a job"""
+        job_id = (data or {}).get('job_id')
+        if not job_id:
+            emit('error', {'error': 'job_id is required'})
+            return
+        join_room(job_room(job_id))
+        emit('joined_job', {'job_id': job_id})
+
+    @socketio.on('leave_job')
+    def handle_leave_job(data):
+        job_id = (data or {}).get('job_id')
+        if job_id:
+            leave_room(job_room(job_id))
+
+    @socketio.on('join_stream')
+    def handle_join_stream(data):
+        """Subscribe the client to detections and stats of a live stream"""
+        stream_id = (data or {}).get('stream_id')
+        if not stream_id:
+            emit('error', {'error': 'stream_id is required'})
+            return
+        join_room(stream_room(stream_id))
+        emit('joined_stream', {'stream_id': stream_id})
+
+    @socketio.on('leave_stream')
+    def handle_leave_stream(data):
+        stream_id = (data or {}).get('stream_id')
+        if stream_id:
+            leave_room(stream_room(stream_id))
+
     return app, socketio
 
 if __name__ == "__main__":
     try:
-        app, socketio = create_app()
+        app, socketio_server = create_app()
         logger.info("Starting Flask server...")
         
         # Set debug mode based on environment
         debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
         
         # Run the server
-        socketio.run(
+        socketio_server.run(
             app,
             host="0.0.0.0",
             port=5000,
@@ -9,10 +9,106 @@ class Config:
     PROCESSED_VIDEOS_FOLDER = os.path.join(BASE_DIR, 'processed_videos')
     PROCESSED_IMAGES_DIR = os.path.join(BASE_DIR, 'processed_images')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'mp4', 'avi', 'mov'}
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Videos are streamed to disk as they arrive, so the request limit can be large
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 512 * 1024 * 1024))  # 512MB max request size
+    MAX_IMAGE_SIZE = int(os.getenv('MAX_IMAGE_SIZE', 16 * 1024 * 1024))  # Images are decoded in memory
+    UPLOAD_MEMORY_BUDGET = int(os.getenv('UPLOAD_MEMORY_BUDGET', 64 * 1024 * 1024))  # Image bytes held in memory per request
+    MAX_BATCH_IMAGES = int(os.getenv('MAX_BATCH_IMAGES', 500))  # Images per batch detection request
+    IMAGE_BATCH_SIZE = int(os.getenv('IMAGE_BATCH_SIZE', 16))  # Images per model call in batch detection
+    IMAGE_IO_WORKERS = int(os.getenv('IMAGE_IO_WORKERS', 4))  # Threads decoding and writing batch images
+    
+    # Detection result cache: processed outputs keyed by upload hash, model and thresholds
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() == 'true'
+    
+    # Storage janitor: one background sweep per node over an index of written files
+    STORAGE_INDEX_PATH = os.getenv('STORAGE_INDEX_PATH', os.path.join(BASE_DIR, 'cache', 'storage.sqlite3'))
+    STORAGE_JANITOR_INTERVAL = float(os.getenv('STORAGE_JANITOR_INTERVAL', 60))  # Seconds between sweeps
+    IMAGE_RESULT_CACHE_MAX_BYTES = int(os.getenv('IMAGE_RESULT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))  # 1GB of processed images
+    VIDEO_RESULT_CACHE_MAX_BYTES = int(os.getenv('VIDEO_RESULT_CACHE_MAX_BYTES', 10 * 1024 * 1024 * 1024))  # 10GB of processed videos
+    PROCESSED_MAX_AGE = int(os.getenv('PROCESSED_MAX_AGE', 7 * 24 * 3600))  # Seconds since last access; 0 = no limit
+    UPLOAD_MAX_AGE = int(os.getenv('UPLOAD_MAX_AGE', 24 * 3600))  # Seconds before a leftover upload is removed
+    
+    # Processed media delivery
+    MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 3600))  # Browser cache lifetime for processed files
+    MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', '').lower()  # '', 'nginx' (X-Accel-Redirect) or 'sendfile' (X-Sendfile)
+    # nginx 'internal' locations aliased to PROCESSED_VIDEOS_FOLDER and PROCESSED_IMAGES_DIR
+    MEDIA_NGINX_VIDEOS_PREFIX = os.getenv('MEDIA_NGINX_VIDEOS_PREFIX', '/internal/processed_videos/')
+    MEDIA_NGINX_IMAGES_PREFIX = os.getenv('MEDIA_NGINX_IMAGES_PREFIX', '/internal/processed_images/')
+    
+    # Weapon info cache: bounded in memory, optionally shared by all worker processes
+    WEAPON_CACHE_MAX_ENTRIES = int(os.getenv('WEAPON_CACHE_MAX_ENTRIES', 256))
+    WEAPON_CACHE_TTL = int(os.getenv('WEAPON_CACHE_TTL', 24 * 3600))  # Seconds in memory
+    WEAPON_CACHE_SHARED = os.getenv('WEAPON_CACHE_SHARED', 'True').lower() == 'true'
+    WEAPON_CACHE_MISS_TTL = float(os.getenv('WEAPON_CACHE_MISS_TTL', 30))  # Seconds before re-reading the shared store for a missing key
+    RISK_CONFIDENCE_BUCKET = float(os.getenv('RISK_CONFIDENCE_BUCKET', 0.25))  # Width of confidence bands
+    ENRICHMENT_CACHE_PATH = os.getenv('ENRICHMENT_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'enrichment.sqlite3'))
+    ENRICHMENT_CACHE_TTL = int(os.getenv('ENRICHMENT_CACHE_TTL', 7 * 24 * 3600))  # Seconds on disk
+    
+    # Alert dispatch settings
+    ALERT_BATCH_WINDOW = float(os.getenv('ALERT_BATCH_WINDOW', 5))  # Seconds to collect alerts into one digest
+    INCIDENT_WINDOW = int(os.getenv('INCIDENT_WINDOW', 60))  # Seconds without a detection before an incident closes
+    MAX_OPEN_INCIDENTS = int(os.getenv('MAX_OPEN_INCIDENTS', 10000))  # Bound on the in-memory incident index
+    ALERT_MAX_RETRIES = int(os.getenv('ALERT_MAX_RETRIES', 3))
+    ALERT_SINKS = [s.strip() for s in os.getenv('ALERT_SINKS', 'email,socketio,log').split(',') if s.strip()]
+    ALERT_RISK_LEVELS = os.getenv('ALERT_RISK_LEVELS', 'high,critical')  # Override per sink with ALERT_<SINK>_RISK_LEVELS
+    ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+    ALERT_WEBHOOK_TIMEOUT = float(os.getenv('ALERT_WEBHOOK_TIMEOUT', 5))
+    ALERT_LOG_PATH = os.getenv('ALERT_LOG_PATH', os.path.join(BASE_DIR, 'logs', 'alerts.log'))
+    ALERT_SYSLOG_ADDRESS = os.getenv('ALERT_SYSLOG_ADDRESS')  # e.g. /dev/log
+    
+    # Live stream settings
+    MAX_STREAMS = int(os.getenv('MAX_STREAMS', 4))  # Concurrent live streams per process
+    STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 2))  # Frames kept before dropping the oldest
+    STREAM_ALLOW_FILES = os.getenv('STREAM_ALLOW_FILES', 'False').lower() == 'true'  # Local files as stand-in streams
+    STREAM_ALLOW_DEVICES = os.getenv('STREAM_ALLOW_DEVICES', 'False').lower() == 'true'  # Capture devices on this host
+    STREAM_ALLOWED_SCHEMES = [s.strip().lower() for s in os.getenv('STREAM_ALLOWED_SCHEMES', 'rtsp,rtsps').split(',') if s.strip()]
+    # Camera hosts streams may connect to: hostnames, '*.example.com' patterns or networks like '10.20.0.0/16'; empty = none
+    STREAM_ALLOWED_HOSTS = [s.strip() for s in os.getenv('STREAM_ALLOWED_HOSTS', '').split(',') if s.strip()]
     
     # Model settings
     WEAPON_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'best.pt')
+    VIOLENCE_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'violence_model.h5')
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch').lower()  # 'torch', 'onnx' or 'openvino'
+    INFERENCE_IMGSZ = int(os.getenv('INFERENCE_IMGSZ', 640))  # Input size exported models are built for
+    MODEL_VERSION = os.getenv('MODEL_VERSION', '')  # Result cache version; default is the weights file's mtime and size
+    # Inference server: with INFERENCE_MODE=remote, web workers send frames to serve_models.py
+    INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'local').lower()  # 'local' or 'remote'
+    INFERENCE_SERVER_ADDRESS = os.getenv('INFERENCE_SERVER_ADDRESS', os.path.join(BASE_DIR, 'cache', 'inference.sock'))
+    # Shared secret for the socket: INFERENCE_SERVER_AUTHKEY, else a random key the server writes (mode 0600) to this file
+    INFERENCE_SERVER_AUTHKEY = os.getenv('INFERENCE_SERVER_AUTHKEY', '')
+    INFERENCE_SERVER_KEY_FILE = os.getenv('INFERENCE_SERVER_KEY_FILE', os.path.join(BASE_DIR, 'cache', 'inference.key'))
+    INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 16))  # Frames per batched model call
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 5))  # Time to wait for a batch to fill
+    
+    # CPU threading, applied once per process when the first model loads
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))  # Server worker processes sharing the machine
+    # Socket.IO message queue (e.g. redis://localhost:6379/0) so events reach clients on any worker; needed when WEB_CONCURRENCY > 1
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+    TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', 0))  # 0 = this worker's share of the CPUs
+    TORCH_INTEROP_THREADS = int(os.getenv('TORCH_INTEROP_THREADS', 1))  # 0 = torch default
+    OPENCV_NUM_THREADS = int(os.getenv('OPENCV_NUM_THREADS', -1))  # -1 = OpenCV default
+    CPU_AFFINITY = os.getenv('CPU_AFFINITY', '')  # '', 'auto' (slice per worker) or a list like '0-3'
+    # Weapon model variant per endpoint: 'fp32' or 'int8' (see scripts/quantize_model.py)
+    IMAGE_MODEL_VARIANT = os.getenv('IMAGE_MODEL_VARIANT', 'fp32')
+    VIDEO_MODEL_VARIANT = os.getenv('VIDEO_MODEL_VARIANT', 'fp32')
+    STREAM_MODEL_VARIANT = os.getenv('STREAM_MODEL_VARIANT', 'fp32')
+    
+    # Video processing settings
+    VIDEO_BATCH_SIZE = int(os.getenv('VIDEO_BATCH_SIZE', 16))  # Frames per model call
+    VIDEO_PIPELINE_QUEUE_SIZE = int(os.getenv('VIDEO_PIPELINE_QUEUE_SIZE', 64))  # Frames buffered between stages
+    SCENE_GATE_ENABLED = os.getenv('SCENE_GATE_ENABLED', 'False').lower() == 'true'  # Opt-in: skips detection on unchanged frames
+    SCENE_GATE_METHOD = os.getenv('SCENE_GATE_METHOD', 'diff')  # 'diff' or 'histogram'
+    SCENE_GATE_THRESHOLD = float(os.getenv('SCENE_GATE_THRESHOLD', 0.02))  # 0-1 change needed to re-run detection
+    SCENE_GATE_MAX_SKIP = int(os.getenv('SCENE_GATE_MAX_SKIP', 150))  # Force detection at least this often
+    TRACKER_IOU_THRESHOLD = float(os.getenv('TRACKER_IOU_THRESHOLD', 0.3))  # Minimum overlap to continue a track
+    TRACKER_MAX_AGE = int(os.getenv('TRACKER_MAX_AGE', 30))  # Frames a track survives without a match
+    PROGRESS_EMIT_INTERVAL = float(os.getenv('PROGRESS_EMIT_INTERVAL', 0.5))  # Min seconds between Socket.IO progress events
+    MAX_CONCURRENT_VIDEO_JOBS = int(os.getenv('MAX_CONCURRENT_VIDEO_JOBS', 2))  # Per process
+    MAX_PENDING_VIDEO_JOBS = int(os.getenv('MAX_PENDING_VIDEO_JOBS', 16))  # Queued + running
+    JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', os.path.join(BASE_DIR, 'cache', 'jobs.sqlite3'))  # Job status shared by all workers
+    VIDEO_OUTPUT_MODE = os.getenv('VIDEO_OUTPUT_MODE', 'mp4').lower()  # 'mp4' or 'hls' (segments playable while processing)
+    HLS_SEGMENT_SECONDS = float(os.getenv('HLS_SEGMENT_SECONDS', 4))  # Length of each HLS segment
+    FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')  # Joins HLS segments into the MP4 without re-encoding
     
     # Create necessary directories
     @classmethod
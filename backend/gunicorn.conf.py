@@ -0,0 +1,55 @@
+"""Gunicorn settings for the backend.
+
+Each worker gets a WORKER_INDEX so utils.cpu_config can give it its own
+slice of the CPUs (CPU_AFFINITY=auto) and size its torch thread pool to
+that slice instead of the whole machine.
+
+Socket.IO limits (job progress and alert events):
+
+- The gthread worker cannot carry WebSocket upgrades, so Socket.IO
+  clients fall back to HTTP long-polling under this config.
+- With WEB_CONCURRENCY > 1, set SOCKETIO_MESSAGE_QUEUE (e.g. a Redis URL,
+  needs the redis package) so events emitted by one worker reach clients
+  connected to another, and route each client to one worker with sticky
+  sessions, since a polling session lives in a single worker.
+"""
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Models are loaded in each worker after the fork, so thread pools and
+# affinity are set per worker
+preload_app = False
+
+
+def on_starting(server):
+    if server.cfg.workers > 1:
+        # Video job status is shared through JOB_STORE_PATH, but a live stream
+        # runs in the worker that started it
+        server.log.warning(
+            f"Running {server.cfg.workers} workers: /api/video/streams/<id> requests "
+            "only reach their stream on the worker that started it, so put the "
+            "workers behind a load balancer with sticky sessions"
+        )
+        if not os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+            server.log.warning(
+                "SOCKETIO_MESSAGE_QUEUE is not set: Socket.IO events only reach "
+                "clients connected to the worker that emitted them"
+            )
+
+
+def pre_fork(server, worker):
+    # Give the new worker the lowest slot no live worker holds, so a
+    # replacement worker takes over the CPUs of the one it replaces
+    used = {getattr(w, 'worker_index', None) for w in server.WORKERS.values()}
+    worker.worker_index = min(set(range(server.cfg.workers)) - used, default=len(used))
+
+
+def post_fork(server, worker):
+    os.environ['WORKER_INDEX'] = str(worker.worker_index)
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+    server.log.info(f"Worker {worker.pid} started with WORKER_INDEX={worker.worker_index}")
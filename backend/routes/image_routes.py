@@ -1,10 +1,17 @@
-from flask import Blueprint, request, jsonify, current_app, send_file, send_from_directory
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from flask_socketio import emit
 import os
 from werkzeug.utils import secure_filename
-from utils.detection_utils import process_detection, load_model, detect_weapons, draw_detections
-from utils.weapon_info import WeaponInfo
-from utils.email_utils import EmailNotifier
+from utils.detection_utils import (
+    process_detection, detect_weapons, detect_weapons_batch, draw_detections, get_model,
+    model_name_for_variant, get_class_names, detections_to_dicts, letterbox
+)
+from utils.enrichment import get_enricher
+from utils.alerts import get_alert_dispatcher
+from utils.incidents import get_incident_tracker
+from utils.uploads import read_upload_bytes, discard_upload
+from utils.media import send_media, MEDIA_ALLOW_HEADERS, MEDIA_EXPOSE_HEADERS
+from utils.result_cache import get_image_result_cache, hash_bytes, result_cache_key
 import logging
 import time
 import psutil
@@ -12,6 +19,10 @@ import cv2
 import numpy as np
 from config import Config
 import json
+import mimetypes
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,37 +34,35 @@ image_bp = Blueprint('image', __name__)
 # Create necessary directories
 Config.create_directories()
 
-# Load the weapon detection model
-weapon_model = load_model(Config.WEAPON_MODEL_PATH)
+# Shared weapon info enricher, incident tracker and alert dispatcher
+weapon_enricher = get_enricher()
+incident_tracker = get_incident_tracker()
+alert_dispatcher = get_alert_dispatcher()
 
-# Initialize weapon info and email notifier
-weapon_info = WeaponInfo()
-email_notifier = EmailNotifier()
+# Processed images keyed by upload content, model and thresholds
+result_cache = get_image_result_cache()
 
-# Cache for weapon information and risk assessments
-weapon_cache = {}
-
-def get_cached_weapon_info(class_name, confidence):
-    """Get weapon information from cache or fetch from API if not cached"""
-    if class_name not in weapon_cache:
-        # Fetch weapon information and risk assessment
-        weapon_data = weapon_info.get_weapon_info(class_name)
-        risk_assessment = weapon_info.get_risk_assessment(class_name, confidence)
-        
-        # Store in cache
-        weapon_cache[class_name] = {
-            'info': weapon_data,
-            'risk_assessment': risk_assessment
-        }
-        
-        # Send email alert if high risk
-        if risk_assessment.get('risk_level', '').lower() in ['high', 'critical']:
-            email_notifier.send_weapon_alert(
-                weapon_data,
-                f"Image: {class_name} detected"
-            )
+def get_cached_weapon_info(class_name, confidence, source='image'):
+    """Get weapon information without blocking on the Gemini API
     
-    return weapon_cache[class_name]
+    Unknown classes get fallback data while enrichment runs in the background.
+    Each detection extends an incident (same class and source within
+    INCIDENT_WINDOW); an incident alerts once, as soon as its risk level is
+    routed to a sink by the alert dispatcher.
+    """
+    cached_data = weapon_enricher.get(class_name, confidence)
+    
+    incident = incident_tracker.observe(class_name, source, confidence)
+    incident_tracker.alert_once(incident, lambda incident: alert_dispatcher.submit(
+        class_name,
+        f"Image: {class_name} detected",
+        cached_data['info'],
+        risk_assessment=cached_data['risk_assessment'],
+        confidence=confidence,
+        incident=incident.to_dict()
+    ))
+    
+    return cached_data
 
 def ensure_directory_exists(directory):
     """Ensure directory exists and has write permissions"""
@@ -99,20 +108,34 @@ def log_system_info():
     except Exception as e:
         logger.warning(f"Error logging system info: {str(e)}")
 
-def cleanup_old_files():
-    """Remove files older than 24 hours from upload and processed directories"""
-    current_time = time.time()
-    for directory in [Config.UPLOAD_FOLDER, Config.PROCESSED_IMAGES_DIR]:
-        try:
-            for filename in os.listdir(directory):
-                file_path = os.path.join(directory, filename)
-                if os.path.isfile(file_path):
-                    file_age = current_time - os.path.getmtime(file_path)
-                    if file_age > 24 * 3600:  # 24 hours in seconds
-                        os.remove(file_path)
-                        logger.info(f"Removed old file: {file_path}")
-        except Exception as e:
-            logger.error(f"Error cleaning up files in {directory}: {str(e)}")
+def image_cache_key(data, model_name):
+    """Result cache key for an image upload under the single-image detection settings"""
+    return result_cache_key(hash_bytes(data), model_name, {
+        'endpoint': 'detect',
+        'conf_threshold': 0.35,
+        'max_dimension': 640
+    })
+
+def cached_image_result(cache_key, start_time):
+    """Stored response for an already processed image, or None
+    
+    Weapon info is looked up again so the summary reflects enrichment that
+    finished since, and the detections still count towards incidents.
+    """
+    if not Config.RESULT_CACHE_ENABLED:
+        return None
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        return None
+    
+    for class_name, summary in cached['detections_summary'].items():
+        cached_data = get_cached_weapon_info(class_name, summary['max_confidence'])
+        summary['weapon_info'] = cached_data['info']
+        summary['risk_assessment'] = cached_data['risk_assessment']
+    
+    cached['processing_time'] = time.time() - start_time
+    cached['cached'] = True
+    return cached
 
 @image_bp.route('/detect', methods=['POST'])
 def process_image():
@@ -129,18 +152,31 @@ def process_image():
             
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'error': 'File type not allowed'}), 400
-            
-        # Clean up old files
-        cleanup_old_files()
         
-        # Save uploaded file
+        # FP32 or INT8 weapon model, per request or per endpoint default
+        model_variant = request.form.get('model_variant', Config.IMAGE_MODEL_VARIANT)
+        try:
+            model_name = model_name_for_variant(model_variant)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         filename = secure_filename(file.filename)
-        input_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-        file.save(input_path)
         
         # Read and process image
         try:
-            image = cv2.imread(input_path)
+            # Decode straight from the request buffer, without a temp file
+            data = read_upload_bytes(file, Config.MAX_IMAGE_SIZE)
+            if data is None:
+                return jsonify({'success': False, 'error': 'Image file too large'}), 413
+            
+            # Same bytes, model and thresholds as an earlier upload: reuse its result
+            cache_key = image_cache_key(data, model_name)
+            cached = cached_image_result(cache_key, start_time)
+            if cached is not None:
+                logger.info(f"Image result cache hit for {filename}")
+                return jsonify(cached)
+            
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
             if image is None:
                 return jsonify({'success': False, 'error': 'Error reading image file'}), 500
                 
@@ -160,7 +196,7 @@ def process_image():
                 image = cv2.convertScaleAbs(image, alpha=1.2, beta=0)
             
             # Detect weapons with optimized confidence threshold
-            detections = detect_weapons(weapon_model, image, conf_threshold=0.35)
+            detections = detect_weapons(get_model(model_name), image, conf_threshold=0.35)
             
             # Draw detections and collect information
             detections_summary = {}
@@ -196,16 +232,11 @@ def process_image():
             # Draw all detections on the original image
             image = draw_detections(image, detections)
             
-            # Save processed image
-            output_path = os.path.join(Config.PROCESSED_IMAGES_DIR, f'processed_{filename}')
+            # Save processed image under a name unique to this result
+            output_name = f'{cache_key[:16]}_{filename}'
+            output_path = os.path.join(Config.PROCESSED_IMAGES_DIR, f'processed_{output_name}')
             cv2.imwrite(output_path, image)
             
-            # Remove original file
-            try:
-                os.remove(input_path)
-            except Exception as e:
-                logger.error(f"Error removing original file: {str(e)}")
-            
             # Calculate processing time
             processing_time = time.time() - start_time
             
@@ -228,9 +259,14 @@ def process_image():
                         'risk_assessment': data['risk_assessment']
                     } for class_name, data in detections_summary.items()
                 },
-                'processed_image_url': f'/api/image/processed/{filename}'
+                'processed_image_url': f'/api/image/processed/{output_name}',
+                'model_variant': model_variant.lower(),
+                'cached': False
             }
             
+            # Stored even with lookups disabled, so the janitor bounds processed images
+            result_cache.put(cache_key, response_data, [f'processed_{output_name}'])
+            
             return jsonify(response_data)
             
         except Exception as e:
@@ -241,6 +277,241 @@ def process_image():
         logger.error(f"Error processing image: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def collect_batch_items(files):
+    """List (name, read) pairs for every image in the uploaded files and zips
+    
+    ``read`` returns the image bytes, or None if the image is too large. Zip
+    entries are checked against MAX_IMAGE_SIZE before being decompressed.
+    """
+    items = []
+    for file in files:
+        if file.filename.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(file.stream)
+            except zipfile.BadZipFile:
+                raise ValueError(f"Not a valid zip file: {file.filename}")
+            for info in archive.infolist():
+                if info.is_dir() or not allowed_file(info.filename):
+                    continue
+                items.append((
+                    os.path.basename(info.filename),
+                    lambda archive=archive, info=info: (
+                        archive.read(info) if info.file_size <= Config.MAX_IMAGE_SIZE else None
+                    )
+                ))
+        elif allowed_file(file.filename):
+            items.append((file.filename, lambda file=file: read_upload_bytes(file, Config.MAX_IMAGE_SIZE)))
+        else:
+            raise ValueError(f"File type not allowed: {file.filename}")
+    return items
+
+def decode_batch_image(data, size):
+    """Decode image bytes and letterbox them to the shared model input size"""
+    if data is None:
+        return None, 'Image file too large'
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, 'Error reading image file'
+    
+    # Same contrast enhancement as single-image detection, for dark images only
+    if np.mean(image) < 100:
+        image = cv2.convertScaleAbs(image, alpha=1.2, beta=0)
+    
+    padded, scale, pad = letterbox(image, size)
+    return (image, padded, scale, pad), None
+
+def batch_cache_key(data, model_name):
+    """Result cache key for one image of a batch, which is letterboxed rather than resized"""
+    return result_cache_key(hash_bytes(data), model_name, {
+        'endpoint': 'detect/batch',
+        'conf_threshold': 0.35,
+        'imgsz': Config.INFERENCE_IMGSZ
+    })
+
+def summarize_batch_detections(detections, class_summary):
+    """Per-class counts for one image, added to the totals for the whole batch"""
+    image_summary = {}
+    for detection in detections:
+        class_name = detection['class']
+        confidence = detection['confidence']
+        cached_data = get_cached_weapon_info(class_name, confidence)
+        
+        summary = image_summary.setdefault(class_name, {'count': 0, 'max_confidence': 0})
+        summary['count'] += 1
+        summary['max_confidence'] = max(summary['max_confidence'], confidence)
+        
+        totals = class_summary.setdefault(class_name, {
+            'count': 0,
+            'images': 0,
+            'max_confidence': 0,
+            'weapon_info': cached_data['info'],
+            'risk_assessment': cached_data['risk_assessment']
+        })
+        totals['count'] += 1
+        totals['max_confidence'] = max(totals['max_confidence'], confidence)
+    for class_name in image_summary:
+        class_summary[class_name]['images'] += 1
+    return image_summary
+
+def write_batch_image(image, detections, output_path):
+    """Draw detections on the original image and save it"""
+    cv2.imwrite(output_path, draw_detections(image, detections))
+
+@image_bp.route('/detect/batch', methods=['POST'])
+def process_image_batch():
+    """Detect weapons in many images (files and/or zip archives) in one request
+    
+    Images are decoded in a thread pool, letterboxed to the model input size
+    and run through the model in batches of IMAGE_BATCH_SIZE, while annotated
+    outputs are written in the background.
+    """
+    try:
+        start_time = time.time()
+        
+        files = [f for f in request.files.getlist('files') + request.files.getlist('file') if f.filename]
+        if not files:
+            return jsonify({'success': False, 'error': 'No files uploaded'}), 400
+        
+        model_variant = request.form.get('model_variant', Config.IMAGE_MODEL_VARIANT)
+        try:
+            model_name = model_name_for_variant(model_variant)
+            items = collect_batch_items(files)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if not items:
+            return jsonify({'success': False, 'error': 'No images found in upload'}), 400
+        if len(items) > Config.MAX_BATCH_IMAGES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many images: {len(items)} (max {Config.MAX_BATCH_IMAGES})'
+            }), 413
+        
+        model = get_model(model_name)
+        class_names = get_class_names(model)
+        
+        batch_id = uuid.uuid4().hex[:12]
+        size = Config.INFERENCE_IMGSZ
+        results = []
+        class_summary = {}
+        pending_writes = []
+        pending_cache = []
+        decode_time = inference_time = 0.0
+        
+        with ThreadPoolExecutor(max_workers=Config.IMAGE_IO_WORKERS, thread_name_prefix='image-batch') as pool:
+            for chunk_start in range(0, len(items), Config.IMAGE_BATCH_SIZE):
+                chunk = items[chunk_start:chunk_start + Config.IMAGE_BATCH_SIZE]
+                
+                # Read sequentially (zip members share one file); images seen before skip the model
+                stage_start = time.time()
+                contents = [read() for _, read in chunk]
+                cache_keys = [batch_cache_key(data, model_name) if data is not None else None for data in contents]
+                cached = [
+                    result_cache.get(key) if key is not None and Config.RESULT_CACHE_ENABLED else None
+                    for key in cache_keys
+                ]
+                
+                # Decode the rest in parallel
+                misses = [i for i, result in enumerate(cached) if result is None]
+                decoded = dict(zip(misses, pool.map(lambda i: decode_batch_image(contents[i], size), misses)))
+                decode_time += time.time() - stage_start
+                
+                ready = [i for i in misses if decoded[i][0] is not None]
+                stage_start = time.time()
+                batch_detections = detect_weapons_batch(
+                    model, [decoded[i][0][1] for i in ready], conf_threshold=0.35, return_arrays=True
+                )
+                inference_time += time.time() - stage_start
+                detections_by_index = dict(zip(ready, batch_detections))
+                
+                for offset, (name, _) in enumerate(chunk):
+                    index = chunk_start + offset
+                    if cached[offset] is not None:
+                        result = dict(cached[offset], filename=name, cached=True)
+                        result['detections_summary'] = summarize_batch_detections(result['detections'], class_summary)
+                        results.append(result)
+                        continue
+                    
+                    entry, error = decoded[offset]
+                    if entry is None:
+                        results.append({'filename': name, 'success': False, 'error': error})
+                        continue
+                    
+                    image, _, scale, (left, top) = entry
+                    detections = detections_by_index[offset]
+                    
+                    # Map boxes from the letterboxed input back to the original image
+                    detections['bbox'] -= np.array([left, top, left, top], dtype=np.float32)
+                    detections['bbox'] /= scale
+                    detections['bbox'] = np.clip(
+                        detections['bbox'], 0, [image.shape[1], image.shape[0], image.shape[1], image.shape[0]]
+                    )
+                    detections = detections_to_dicts(detections, class_names)
+                    image_summary = summarize_batch_detections(detections, class_summary)
+                    
+                    output_name = f"{batch_id}_{index}_{secure_filename(name) or 'image.jpg'}"
+                    output_path = os.path.join(Config.PROCESSED_IMAGES_DIR, f'processed_{output_name}')
+                    pending_writes.append(pool.submit(write_batch_image, image, detections, output_path))
+                    
+                    result = {
+                        'filename': name,
+                        'success': True,
+                        'width': image.shape[1],
+                        'height': image.shape[0],
+                        'detections': detections,
+                        'detections_summary': image_summary,
+                        'processed_image_url': f'/api/image/processed/{output_name}',
+                        'cached': False
+                    }
+                    results.append(result)
+                    pending_cache.append((cache_keys[offset], result, f'processed_{output_name}'))
+            
+            # Every output must exist before its URL is returned
+            stage_start = time.time()
+            for future in pending_writes:
+                future.result()
+            write_wait_time = time.time() - stage_start
+        
+        # Outputs are on disk now, so their sizes count towards the storage quota
+        for key, result, output_file in pending_cache:
+            result_cache.put(key, result, [output_file])
+        
+        processing_time = time.time() - start_time
+        processed = [r for r in results if r['success']]
+        logger.info(f"Batch {batch_id}: {len(processed)}/{len(results)} images in {processing_time:.2f} seconds")
+        
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'images': results,
+            'summary': {
+                'total_images': len(results),
+                'processed_images': len(processed),
+                'failed_images': len(results) - len(processed),
+                'cached_images': sum(1 for r in processed if r['cached']),
+                'images_with_detections': sum(1 for r in processed if r['detections']),
+                'total_detections': sum(len(r['detections']) for r in processed),
+                'detections_by_class': class_summary
+            },
+            'timing': {
+                'processing_time': processing_time,
+                'decode_time': decode_time,
+                'inference_time': inference_time,
+                'write_wait_time': write_wait_time,
+                'images_per_second': len(processed) / processing_time if processing_time > 0 else 0.0
+            },
+            'model_variant': model_variant.lower()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error processing image batch: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    finally:
+        # Zip archives are spooled to disk while they upload
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            discard_upload(file)
+
 @image_bp.route('/processed/<filename>')
 def serve_processed_image(filename):
     """Serve processed image file"""
@@ -249,7 +520,8 @@ def serve_processed_image(filename):
         if not os.path.exists(processed_path):
             return jsonify({'error': 'Processed image not found'}), 404
             
-        return send_file(processed_path, mimetype='image/jpeg')
+        mimetype = mimetypes.guess_type(processed_path)[0] or 'image/jpeg'
+        return send_media(processed_path, mimetype, Config.MEDIA_NGINX_IMAGES_PREFIX)
         
     except Exception as e:
         logger.error(f"Error serving processed image: {str(e)}")
@@ -257,7 +529,8 @@ def serve_processed_image(filename):
 
 @image_bp.after_request
 def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,OPTIONS')
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = MEDIA_ALLOW_HEADERS
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = MEDIA_EXPOSE_HEADERS
     return response 
\ No newline at end of file
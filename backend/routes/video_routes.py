@@ -1,9 +1,22 @@
 from flask import Blueprint, request, jsonify, current_app, send_file, Response, send_from_directory
 import os
-from werkzeug.utils import secure_filename
-from utils.detection_utils import load_model, detect_weapons, draw_detections
-from utils.weapon_info import WeaponInfo
-from utils.email_utils import EmailNotifier
+from utils.detection_utils import (
+    detect_weapons, detect_weapons_batch, draw_detections, IoUTracker,
+    get_class_names, detections_to_dicts, get_model, model_name_for_variant
+)
+from utils.enrichment import get_enricher
+from utils.alerts import get_alert_dispatcher
+from utils.incidents import get_incident_tracker
+from utils.job_queue import JobQueue, JobStore
+from utils.video_pipeline import VideoPipeline
+from utils.sampling import SamplingPolicy, SceneChangeGate
+from utils.uploads import stage_upload, discard_upload, release_upload
+from utils.media import send_media, MEDIA_ALLOW_HEADERS, MEDIA_EXPOSE_HEADERS
+from utils.hls import SegmentingVideoWriter, PLAYLIST_NAME, SEGMENT_NAME_PATTERN
+from utils.storage import get_storage_janitor
+from utils.result_cache import get_video_result_cache, hash_file, result_cache_key
+from utils.realtime import ProgressReporter, emit_to_room, job_room
+from utils.stream_ingest import StreamManager, parse_stream_source
 from config import Config
 import logging
 import time
@@ -25,37 +38,51 @@ video_bp = Blueprint('video', __name__)
 # Create necessary directories
 Config.create_directories()
 
-# Load the weapon detection model
-weapon_model = load_model(Config.WEAPON_MODEL_PATH)
+# Shared weapon info enricher, incident tracker and alert dispatcher
+weapon_enricher = get_enricher()
+incident_tracker = get_incident_tracker()
+alert_dispatcher = get_alert_dispatcher()
 
-# Initialize weapon info and email notifier
-weapon_info = WeaponInfo()
-email_notifier = EmailNotifier()
+# Background pool for video jobs, capped per process; status is shared by all workers
+video_jobs = JobQueue(
+    max_workers=Config.MAX_CONCURRENT_VIDEO_JOBS,
+    max_pending=Config.MAX_PENDING_VIDEO_JOBS,
+    store=JobStore(Config.JOB_STORE_PATH)
+)
 
-# Cache for weapon information and risk assessments
-weapon_cache = {}
+# Processed videos keyed by upload content, model and sampling options
+result_cache = get_video_result_cache()
 
-def get_cached_weapon_info(class_name, confidence):
-    """Get weapon information from cache or fetch from API if not cached"""
-    if class_name not in weapon_cache:
-        # Fetch weapon information and risk assessment
-        weapon_data = weapon_info.get_weapon_info(class_name)
-        risk_assessment = weapon_info.get_risk_assessment(class_name, confidence)
-        
-        # Store in cache
-        weapon_cache[class_name] = {
-            'info': weapon_data,
-            'risk_assessment': risk_assessment
-        }
-        
-        # Send email alert if high risk
-        if risk_assessment.get('risk_level', '').lower() in ['high', 'critical']:
-            email_notifier.send_weapon_alert(
-                weapon_data,
-                f"Video: {class_name} detected"
-            )
+# Live stream sessions, capped per process
+video_streams = StreamManager(max_streams=Config.MAX_STREAMS)
+
+# Form fields that control the scene change gate
+SCENE_GATE_PARAMS = ('scene_gate', 'scene_threshold', 'scene_method')
+
+# 'mp4' writes one file at the end; 'hls' also publishes segments while the job runs
+OUTPUT_MODES = ('mp4', 'hls')
+
+def get_cached_weapon_info(class_name, confidence, source='video'):
+    """Get weapon information without blocking on the Gemini API
+    
+    Unknown classes get fallback data while enrichment runs in the background.
+    Each detection extends an incident (same class and source within
+    INCIDENT_WINDOW); an incident alerts once, as soon as its risk level is
+    routed to a sink by the alert dispatcher.
+    """
+    cached_data = weapon_enricher.get(class_name, confidence)
     
-    return weapon_cache[class_name]
+    incident = incident_tracker.observe(class_name, source, confidence)
+    incident_tracker.alert_once(incident, lambda incident: alert_dispatcher.submit(
+        class_name,
+        f"Video {source}: {class_name} detected",
+        cached_data['info'],
+        risk_assessment=cached_data['risk_assessment'],
+        confidence=confidence,
+        incident=incident.to_dict()
+    ))
+    
+    return cached_data
 
 def ensure_directory_exists(directory):
     """Ensure directory exists and has write permissions"""
@@ -101,21 +128,6 @@ def log_system_info():
     except Exception as e:
         logger.warning(f"Error logging system info: {str(e)}")
 
-def cleanup_old_files():
-    """Remove files older than 24 hours from upload and processed directories"""
-    current_time = time.time()
-    for directory in [Config.UPLOAD_FOLDER, Config.PROCESSED_VIDEOS_FOLDER]:
-        try:
-            for filename in os.listdir(directory):
-                file_path = os.path.join(directory, filename)
-                if os.path.isfile(file_path):
-                    file_age = current_time - os.path.getmtime(file_path)
-                    if file_age > 24 * 3600:  # 24 hours in seconds
-                        os.remove(file_path)
-                        logger.info(f"Removed old file: {file_path}")
-        except Exception as e:
-            logger.error(f"Error cleaning up files in {directory}: {str(e)}")
-
 def draw_bounding_box(frame, x1, y1, x2, y2, label, confidence):
     """Draw a bounding box with label on the frame"""
     try:
@@ -143,12 +155,394 @@ def draw_bounding_box(frame, x1, y1, x2, y2, label, confidence):
         logger.error(f"Error drawing bounding box: {str(e)}")
         return frame
 
+def preprocess_video_frame(frame, width, height, max_dimension=640):
+    """Prepare a video frame for detection"""
+    # 1. Resize frame if too large (optimized for detection)
+    if max(width, height) > max_dimension:
+        scale = max_dimension / max(width, height)
+        frame = cv2.resize(frame, None, fx=scale, fy=scale)
+    
+    # 2. Quick contrast enhancement
+    frame = cv2.convertScaleAbs(frame, alpha=1.2, beta=0)
+    
+    # 3. Light Gaussian blur for noise reduction
+    return cv2.GaussianBlur(frame, (3, 3), 0)
+
+class VideoFrameProcessor:
+    """Runs weapon detection over batches of frames and builds the video summary.
+    
+    Frames the sampling policy skips, or that the scene change gate finds
+    unchanged, are not sent to the model; they are annotated with the boxes
+    the tracker predicts from the most recent inferred frame instead.
+    Detections are linked into tracks, so the summary counts objects rather
+    than per-frame boxes.
+    """
+    
+    def __init__(self, model, width, height, total_frames, sampling=None, scene_gate=None,
+                 tracker=None, on_detections=None, conf_threshold=0.25, max_dimension=640,
+                 source='video'):
+        self.model = model
+        self.source = source
+        self.width = width
+        self.height = height
+        self.total_frames = total_frames
+        self.sampling = sampling or SamplingPolicy()
+        self.scene_gate = scene_gate
+        self.tracker = tracker or IoUTracker(
+            iou_threshold=Config.TRACKER_IOU_THRESHOLD,
+            max_age=Config.TRACKER_MAX_AGE
+        )
+        self.on_detections = on_detections
+        self.conf_threshold = conf_threshold
+        self.max_dimension = max_dimension
+        self.class_names = get_class_names(model)
+        
+        self.detections_summary = {}
+        self.confidence_data = []  # Store confidence data for each frame
+        self.inferred_frames = 0
+        self.skipped_frames = 0
+        
+        # Last frame that was run through the model
+        self._last_inferred_frame = -1
+    
+    def process_batch(self, frames, first_frame_index):
+        """Detect weapons in a batch of consecutive frames and draw the results.
+        
+        Frames are sampled one at a time. While adaptive sampling is waiting
+        for a detection, the frames up to each sampled one are run right
+        away, so a detection densifies sampling from the next frame instead
+        of the next batch. Returns the annotated frames in the same order as
+        ``frames``.
+        """
+        processed_frames = []
+        segment_start = 0
+        sampled = []
+        scene_changed = []
+        for i, frame in enumerate(frames):
+            frame_index = first_frame_index + i
+            sample = self.sampling.should_sample(frame_index)
+            
+            # Only frames whose scene changed since the last inference go to the model
+            changed = False
+            if sample and self.scene_gate:
+                changed = self.scene_gate.check(frame_index, frame)
+                sample = changed
+            sampled.append(sample)
+            scene_changed.append(changed)
+            
+            if sample and self.sampling.needs_feedback():
+                processed_frames += self._process_segment(
+                    frames[segment_start:i + 1], first_frame_index + segment_start, sampled, scene_changed
+                )
+                segment_start = i + 1
+                sampled = []
+                scene_changed = []
+        
+        if segment_start < len(frames):
+            processed_frames += self._process_segment(
+                frames[segment_start:], first_frame_index + segment_start, sampled, scene_changed
+            )
+        return processed_frames
+    
+    def _process_segment(self, frames, first_frame_index, sampled, scene_changed):
+        """Run the sampled frames of a segment through the model and draw every frame"""
+        frame_indices = range(first_frame_index, first_frame_index + len(frames))
+        
+        try:
+            batch = [
+                preprocess_video_frame(frame, self.width, self.height, self.max_dimension)
+                for frame, sample in zip(frames, sampled) if sample
+            ]
+            batch_detections = iter(detect_weapons_batch(
+                self.model, batch, conf_threshold=self.conf_threshold, return_arrays=True
+            ))
+        except Exception as e:
+            logger.error(f"Error processing frames {first_frame_index}-{first_frame_index + len(frames) - 1}: {str(e)}")
+            return frames
+        
+        processed_frames = []
+        for frame, frame_index, sample, changed in zip(frames, frame_indices, sampled, scene_changed):
+            try:
+                if sample:
+                    detections = self._record_detections(frame_index, next(batch_detections))
+                    self.sampling.observe(frame_index, detections, scene_changed=changed)
+                    self._last_inferred_frame = frame_index
+                    self.inferred_frames += 1
+                else:
+                    # Carry forward the tracks seen on the last inferred frame
+                    detections = self.tracker.predict(frame_index, min_last_frame=self._last_inferred_frame)
+                    self.skipped_frames += 1
+                
+                if detections:
+                    frame = draw_detections(frame, detections)
+            
+            except Exception as e:
+                logger.error(f"Error processing frame {frame_index}: {str(e)}")
+            
+            processed_frames.append(frame)
+        
+        return processed_frames
+    
+    def _record_detections(self, frame_index, detections):
+        """Filter and scale a frame's detection array, track it and add it to the summary.
+        
+        Returns the kept detections as dicts.
+        """
+        # Only process detections with confidence above threshold
+        detections = detections[detections['confidence'] >= self.conf_threshold]
+        
+        # Scale detection coordinates back to original frame size
+        if max(self.width, self.height) > self.max_dimension:
+            detections['bbox'] = np.trunc(detections['bbox'] * (max(self.width, self.height) / self.max_dimension))
+        
+        # Dicts are only built for the detections that are kept
+        frame_detections = []
+        kept = detections_to_dicts(detections, self.class_names)
+        
+        # Link detections to tracks before recording them
+        self.tracker.update(frame_index, kept)
+        
+        for detection in kept:
+            class_name = detection['class']
+            confidence = detection['confidence']
+            
+            # Get weapon information from cache or API
+            cached_data = get_cached_weapon_info(class_name, confidence, self.source)
+            
+            # Update detections summary
+            if class_name not in self.detections_summary:
+                self.detections_summary[class_name] = {
+                    'count': 0,
+                    'detection_count': 0,
+                    'max_confidence': 0,
+                    'tracks': [],
+                    'info': cached_data['info'],
+                    'risk_assessment': cached_data['risk_assessment']
+                }
+            
+            summary = self.detections_summary[class_name]
+            summary['detection_count'] += 1
+            summary['max_confidence'] = max(summary['max_confidence'], confidence)
+            
+            # Add to frame detections
+            frame_detections.append({
+                'class': class_name,
+                'confidence': confidence,
+                'frame': frame_index,
+                'track_id': detection['track_id']
+            })
+        
+        # Add confidence data for this frame
+        self.confidence_data.extend(frame_detections)
+        
+        if self.on_detections and kept:
+            self.on_detections(frame_index, kept)
+        
+        # Log detection results for debugging
+        if frame_detections:
+            logger.info(f"Frame {frame_index}/{self.total_frames}: Detected {len(frame_detections)} weapons")
+            for detection in frame_detections:
+                logger.info(f"  - {detection['class']} (confidence: {detection['confidence']:.2f})")
+        
+        return kept
+    
+    def finalize(self):
+        """Close all tracks and add one record per track to the summary"""
+        for record in self.tracker.finish():
+            summary = self.detections_summary.get(record['class'])
+            if summary is None:
+                continue
+            summary['tracks'].append(record)
+            summary['count'] = len(summary['tracks'])
+        return self.detections_summary
+    
+    def sampling_stats(self):
+        """Summarize how many frames were inferred vs. carried forward"""
+        stats = {
+            **self.sampling.describe(),
+            'inferred_frames': self.inferred_frames,
+            'skipped_frames': self.skipped_frames
+        }
+        if self.scene_gate:
+            stats['scene_gate'] = self.scene_gate.stats()
+        return stats
+
+def create_scene_gate(params):
+    """Build the scene change gate for a job, or None if it is disabled"""
+    enabled = str(params.get('scene_gate', Config.SCENE_GATE_ENABLED)).lower() == 'true'
+    if not enabled:
+        return None
+    return SceneChangeGate(
+        threshold=float(params.get('scene_threshold', Config.SCENE_GATE_THRESHOLD)),
+        method=params.get('scene_method', Config.SCENE_GATE_METHOD),
+        max_skip_frames=Config.SCENE_GATE_MAX_SKIP
+    )
+
+def hls_dir(filename):
+    """Folder holding the HLS playlist and segments of a job's output"""
+    return os.path.join(Config.PROCESSED_VIDEOS_FOLDER, f'hls_{filename}')
+
+def hls_files(filename):
+    """Playlist and segments of a job's output, relative to the processed videos folder"""
+    folder = hls_dir(filename)
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(os.path.basename(folder), name) for name in sorted(os.listdir(folder))]
+
+def playlist_url(filename):
+    return f'/api/video/processed/{filename}/hls/{PLAYLIST_NAME}'
+
+def run_video_job(job, model, input_path, filename, sampling_params=None, output_mode='mp4'):
+    """Run weapon detection over a staged video file and return the results"""
+    start_time = time.time()
+    
+    # Initialize video capture
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        cap.release()
+        raise ValueError('Error opening video file')
+        
+    # Get video properties
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    job.update_progress(0, total_frames)
+    
+    # Live progress for clients in the job's Socket.IO room
+    reporter = ProgressReporter(job.id, total_frames)
+    
+    logger.info(f"Video properties - FPS: {fps}, Resolution: {width}x{height}, Total frames: {total_frames}")
+    
+    # Create output video writer with H.264 codec
+    output_path = os.path.join(Config.PROCESSED_VIDEOS_FOLDER, f'processed_{filename}')
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # Use H.264 codec
+    if output_mode == 'hls':
+        # Frames are encoded once, into the segments; the MP4 is joined from them afterwards
+        def publish_segment(segment_path, segment_count):
+            # Segments count towards the processed video quota as soon as they exist
+            index = get_storage_janitor().index
+            index.add(segment_path, 'processed_video')
+            index.add(os.path.join(os.path.dirname(segment_path), PLAYLIST_NAME), 'processed_video')
+            if segment_count == 1:
+                emit_to_room('job_playlist', {
+                    'job_id': job.id,
+                    'playlist_url': playlist_url(filename)
+                }, job_room(job.id))
+        
+        out = SegmentingVideoWriter(
+            fourcc, fps, (width, height), hls_dir(filename),
+            segment_seconds=Config.HLS_SEGMENT_SECONDS, on_segment=publish_segment
+        )
+    else:
+        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    
+    if not out.isOpened():
+        cap.release()
+        raise RuntimeError('Error creating output video')
+        
+    # Process video frames
+    sampling_params = sampling_params or {}
+    processor = VideoFrameProcessor(
+        model, width, height, total_frames,
+        sampling=SamplingPolicy.from_params(sampling_params, fps),
+        scene_gate=create_scene_gate(sampling_params),
+        on_detections=reporter.detections,
+        source=filename
+    )
+    detections_summary = processor.detections_summary
+    
+    last_logged = 0
+    
+    def report_progress(frames_written):
+        nonlocal last_logged
+        job.update_progress(frames_written)
+        reporter.progress(frames_written)
+        # Log progress every 100 frames
+        if total_frames and frames_written - last_logged >= 100:
+            last_logged = frames_written
+            logger.info(f"Processed {frames_written}/{total_frames} frames ({(frames_written/total_frames)*100:.1f}%)")
+    
+    # Decode, inference and encode run concurrently, connected by bounded queues
+    pipeline = VideoPipeline(
+        cap, out, processor.process_batch,
+        batch_size=Config.VIDEO_BATCH_SIZE,
+        queue_size=Config.VIDEO_PIPELINE_QUEUE_SIZE,
+        check_cancelled=job.check_cancelled,
+        on_progress=report_progress
+    )
+    
+    try:
+        frame_count = pipeline.run()
+    finally:
+        # Release resources
+        cap.release()
+        out.release()
+        reporter.flush()
+    
+    # Nothing to join when no frame was decoded
+    if output_mode == 'hls' and out.segments:
+        out.remux(output_path, Config.FFMPEG_BINARY)
+    
+    # One summary entry per tracked object instead of per detected box
+    processor.finalize()
+    
+    # Calculate processing time
+    processing_time = time.time() - start_time
+    
+    # Log final results
+    logger.info(f"Video processing completed in {processing_time:.2f} seconds")
+    logger.info(f"Total frames processed: {frame_count}")
+    logger.info(f"Total detections: {sum(d['count'] for d in detections_summary.values())}")
+    for class_name, data in detections_summary.items():
+        logger.info(f"  {class_name}: {data['count']} detections (max confidence: {data['max_confidence']:.2f})")
+    
+    # Prepare response data
+    result = {
+        'success': True,
+        'total_frames': total_frames,
+        'processed_frames': frame_count,
+        'processing_time': processing_time,
+        'detections_summary': detections_summary,
+        'confidence_data': processor.confidence_data,
+        'sampling': processor.sampling_stats(),
+        'skipped_inferences': processor.skipped_frames,
+        'processed_video_url': f'/api/video/processed/{filename}',
+        'cached': False
+    }
+    if output_mode == 'hls':
+        result['playlist_url'] = playlist_url(filename)
+    return result
+
+def finish_video_job(job, input_path, cache_key=None):
+    """Release a finished job's upload, cache or discard its output and announce its final status"""
+    release_upload(input_path)
+    
+    output_file = f'processed_{job.filename}'
+    if job.status == job.COMPLETED:
+        # Stored even with lookups disabled, so the janitor bounds processed videos
+        if cache_key:
+            result_cache.put(cache_key, job.result, [output_file] + hls_files(job.filename))
+    else:
+        # A failed or cancelled job leaves a partial video nobody can fetch
+        output_path = os.path.join(Config.PROCESSED_VIDEOS_FOLDER, output_file)
+        try:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            shutil.rmtree(hls_dir(job.filename), ignore_errors=True)
+        except Exception as e:
+            logger.error(f"Error removing partial output: {str(e)}")
+    
+    status = job.to_dict()
+    status.pop('result', None)
+    if job.result:
+        status['processed_video_url'] = job.result.get('processed_video_url')
+    emit_to_room('job_status', status, job_room(job.id))
+
 @video_bp.route('/detect', methods=['POST'])
 def process_video():
-    """Process video for weapon detection"""
+    """Queue a video for weapon detection and return its job ID"""
     try:
-        start_time = time.time()
-        
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file part'}), 400
             
@@ -157,196 +551,215 @@ def process_video():
             return jsonify({'success': False, 'error': 'No selected file'}), 400
             
         if not allowed_file(file.filename):
+            discard_upload(file)
             return jsonify({'success': False, 'error': 'File type not allowed'}), 400
-            
-        # Clean up old files
-        cleanup_old_files()
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        input_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-        file.save(input_path)
-        
-        # Initialize video capture
-        cap = cv2.VideoCapture(input_path)
-        if not cap.isOpened():
-            return jsonify({'success': False, 'error': 'Error opening video file'}), 500
-            
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        logger.info(f"Video properties - FPS: {fps}, Resolution: {width}x{height}, Total frames: {total_frames}")
-        
-        # Create output video writer with H.264 codec
-        output_path = os.path.join(Config.PROCESSED_VIDEOS_FOLDER, f'processed_{filename}')
-        fourcc = cv2.VideoWriter_fourcc(*'avc1')  # Use H.264 codec
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        if not out.isOpened():
-            return jsonify({'success': False, 'error': 'Error creating output video'}), 500
-            
-        # Process video frames
-        frame_count = 0
-        detections_summary = {}
-        confidence_data = []  # Store confidence data for each frame
         
-        # Pre-allocate frame buffer for faster processing
-        frame_buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        # Validate the frame sampling and model options before accepting the upload
+        sampling_params = {key: request.form[key] for key in SamplingPolicy.PARAMS + SCENE_GATE_PARAMS
+                           if key in request.form}
+        model_variant = request.form.get('model_variant', Config.VIDEO_MODEL_VARIANT)
+        output_mode = request.form.get('output_mode', Config.VIDEO_OUTPUT_MODE).lower()
+        try:
+            SamplingPolicy.from_params(sampling_params, fps=30.0)
+            create_scene_gate(sampling_params)
+            model_name = model_name_for_variant(model_variant)
+            if output_mode not in OUTPUT_MODES:
+                raise ValueError(f"Unknown output_mode: {output_mode} (expected one of {', '.join(OUTPUT_MODES)})")
+            if output_mode == 'hls' and shutil.which(Config.FFMPEG_BINARY) is None:
+                raise ValueError('HLS output is not available: ffmpeg is not installed on the server')
+        except ValueError as e:
+            discard_upload(file)
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                    
-                try:
-                    # Copy frame to buffer for faster processing
-                    np.copyto(frame_buffer, frame)
-                    
-                    # Preprocess frame for better detection
-                    # 1. Resize frame if too large (optimized for detection)
-                    max_dimension = 640  # Reduced from 1280 for faster processing
-                    if max(width, height) > max_dimension:
-                        scale = max_dimension / max(width, height)
-                        frame_buffer = cv2.resize(frame_buffer, None, fx=scale, fy=scale)
-                    
-                    # 2. Quick contrast enhancement
-                    frame_buffer = cv2.convertScaleAbs(frame_buffer, alpha=1.2, beta=0)
-                    
-                    # 3. Light Gaussian blur for noise reduction
-                    frame_buffer = cv2.GaussianBlur(frame_buffer, (3, 3), 0)
-                    
-                    # Detect weapons with adjusted confidence threshold
-                    detections = detect_weapons(weapon_model, frame_buffer, conf_threshold=0.25)
-                    
-                    # Draw detections and collect information
-                    frame_detections = []
-                    for detection in detections:
-                        class_name = detection['class']
-                        confidence = detection['confidence']
-                        
-                        # Only process detections with confidence above threshold
-                        if confidence >= 0.25:
-                            # Scale detection coordinates back to original frame size
-                            if max(width, height) > max_dimension:
-                                scale = width / frame_buffer.shape[1]
-                                detection['bbox'] = [int(x * scale) for x in detection['bbox']]
-                            
-                            # Draw detection on original frame
-                            frame = draw_detections(frame, [detection])
-                            
-                            # Get weapon information from cache or API
-                            cached_data = get_cached_weapon_info(class_name, confidence)
-                            
-                            # Update detections summary
-                            if class_name not in detections_summary:
-                                detections_summary[class_name] = {
-                                    'count': 0,
-                                    'max_confidence': 0,
-                                    'frames_detected': [],
-                                    'info': cached_data['info'],
-                                    'risk_assessment': cached_data['risk_assessment']
-                                }
-                            
-                            detections_summary[class_name]['count'] += 1
-                            detections_summary[class_name]['max_confidence'] = max(
-                                detections_summary[class_name]['max_confidence'],
-                                confidence
-                            )
-                            detections_summary[class_name]['frames_detected'].append(frame_count)
-                            
-                            # Add to frame detections
-                            frame_detections.append({
-                                'class': class_name,
-                                'confidence': confidence,
-                                'frame': frame_count
-                            })
-                    
-                    # Add confidence data for this frame
-                    confidence_data.extend(frame_detections)
-                    
-                    # Log detection results for debugging
-                    if frame_detections:
-                        logger.info(f"Frame {frame_count}/{total_frames}: Detected {len(frame_detections)} weapons")
-                        for detection in frame_detections:
-                            logger.info(f"  - {detection['class']} (confidence: {detection['confidence']:.2f})")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing frame {frame_count}: {str(e)}")
-                    continue
-                
-                # Write processed frame
-                out.write(frame)
-                frame_count += 1
-                
-                # Log progress every 100 frames
-                if frame_count % 100 == 0:
-                    logger.info(f"Processed {frame_count}/{total_frames} frames ({(frame_count/total_frames)*100:.1f}%)")
-                
+            model = get_model(model_name)
         except Exception as e:
-            logger.error(f"Error during video processing: {str(e)}")
-            return jsonify({'success': False, 'error': f'Error processing video: {str(e)}'}), 500
-        finally:
-            # Release resources
-            cap.release()
-            out.release()
-            
-            # Remove original file
-            try:
-                os.remove(input_path)
-            except Exception as e:
-                logger.error(f"Error removing original file: {str(e)}")
+            discard_upload(file)
+            logger.error(f"Error loading {model_name} model: {str(e)}")
+            return jsonify({'success': False, 'error': str(e)}), 503
+        
+        if video_jobs.pending_count() >= video_jobs.max_pending:
+            discard_upload(file)
+            return jsonify({'success': False, 'error': 'Too many video jobs in progress, try again later'}), 503
         
-        # Calculate processing time
-        processing_time = time.time() - start_time
+        # The body was streamed into the upload folder while it arrived; give it
+        # a unique name so concurrent jobs never collide
+        input_path = stage_upload(file)
+        filename = os.path.basename(input_path)
         
-        # Log final results
-        logger.info(f"Video processing completed in {processing_time:.2f} seconds")
-        logger.info(f"Total frames processed: {frame_count}")
-        logger.info(f"Total detections: {sum(d['count'] for d in detections_summary.values())}")
-        for class_name, data in detections_summary.items():
-            logger.info(f"  {class_name}: {data['count']} detections (max confidence: {data['max_confidence']:.2f})")
+        # Same bytes, model, sampling options and output mode as an earlier upload: reuse its
+        # result, which for HLS includes the playlist and segments
+        cache_key = result_cache_key(hash_file(input_path), model_name, dict(sampling_params, output_mode=output_mode))
+        cached = result_cache.get(cache_key) if Config.RESULT_CACHE_ENABLED else None
+        if cached is not None:
+            release_upload(input_path)
+            # The detections still count towards incidents and alerts
+            for class_name, summary in cached['detections_summary'].items():
+                get_cached_weapon_info(class_name, summary['max_confidence'], filename)
+            job = video_jobs.add_completed(filename, dict(cached, cached=True))
+            logger.info(f"Video result cache hit for {file.filename}")
+            response_data = {
+                'success': True,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/api/video/jobs/{job.id}',
+                'cached': True
+            }
+            if 'playlist_url' in cached:
+                response_data['playlist_url'] = cached['playlist_url']
+            return jsonify(response_data), 202
+        
+        job = video_jobs.submit(
+            filename, run_video_job, model, input_path, filename, sampling_params, output_mode,
+            on_finish=lambda finished_job: finish_video_job(finished_job, input_path, cache_key)
+        )
+        if job is None:
+            release_upload(input_path)
+            return jsonify({'success': False, 'error': 'Too many video jobs in progress, try again later'}), 503
         
-        # Prepare response data
         response_data = {
             'success': True,
-            'total_frames': total_frames,
-            'processed_frames': frame_count,
-            'processing_time': processing_time,
-            'detections_summary': detections_summary,
-            'confidence_data': confidence_data,
-            'processed_video_url': f'/api/video/processed/{filename}'
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/video/jobs/{job.id}'
         }
+        if output_mode == 'hls':
+            # Available once the first segment is written (announced as job_playlist)
+            response_data['playlist_url'] = playlist_url(filename)
+        return jsonify(response_data), 202
+        
+    except Exception as e:
+        logger.error(f"Error queuing video: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@video_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_video_job(job_id):
+    """Get status, progress and results of a video job"""
+    job = video_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@video_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_video_job(job_id):
+    """Cancel a queued or running video job"""
+    job = video_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+def detect_stream_frame(model, frame, conf_threshold=0.25):
+    """Detect weapons in one live frame, with boxes in original frame coordinates"""
+    height, width = frame.shape[:2]
+    processed = preprocess_video_frame(frame, width, height)
+    detections = detect_weapons(model, processed, conf_threshold=conf_threshold)
+    
+    scale = width / processed.shape[1]
+    for detection in detections:
+        detection['bbox'] = [x * scale for x in detection['bbox']]
+    return detections
+
+def handle_stream_detections(session, frame_index, detections):
+    """Look up weapon info (and raise alerts) for detections on a live stream"""
+    for detection in detections:
+        get_cached_weapon_info(detection['class'], detection['confidence'], f"stream {session.id}")
+
+@video_bp.route('/streams', methods=['POST'])
+def start_stream():
+    """Start continuous detection on an allowed RTSP/HTTP URL or capture device"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        try:
+            source = parse_stream_source(
+                data.get('source'),
+                allow_files=Config.STREAM_ALLOW_FILES,
+                allow_devices=Config.STREAM_ALLOW_DEVICES,
+                allowed_schemes=Config.STREAM_ALLOWED_SCHEMES,
+                allowed_hosts=Config.STREAM_ALLOWED_HOSTS
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        try:
+            model_name = model_name_for_variant(data.get('model_variant', Config.STREAM_MODEL_VARIANT))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify(response_data)
+        model = get_model(model_name)
+        session = video_streams.start(
+            source,
+            lambda frame: detect_stream_frame(model, frame),
+            on_detections=handle_stream_detections,
+            buffer_size=Config.STREAM_BUFFER_SIZE,
+            loop=str(data.get('loop', 'false')).lower() == 'true'
+        )
+        if session is None:
+            return jsonify({'success': False, 'error': 'Too many active streams'}), 503
+        
+        return jsonify({'success': True, 'room': session.room, **session.to_dict()}), 201
         
     except Exception as e:
-        logger.error(f"Error processing video: {str(e)}")
+        logger.error(f"Error starting stream: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@video_bp.route('/streams', methods=['GET'])
+def list_streams():
+    """List live streams with their latency and dropped-frame counters"""
+    return jsonify({'success': True, 'streams': [session.to_dict() for session in video_streams.list()]})
+
+@video_bp.route('/streams/<stream_id>', methods=['GET'])
+def get_stream(stream_id):
+    """Get status and counters of a live stream"""
+    session = video_streams.get(stream_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Stream not found'}), 404
+    return jsonify({'success': True, **session.to_dict()})
+
+@video_bp.route('/streams/<stream_id>/stop', methods=['POST'])
+def stop_stream(stream_id):
+    """Stop a live stream"""
+    session = video_streams.stop(stream_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Stream not found'}), 404
+    return jsonify({'success': True, **session.to_dict()})
+
 @video_bp.route('/processed/<filename>')
 def serve_processed_video(filename):
-    """Serve processed video file"""
+    """Serve processed video file, with byte ranges so players can seek"""
     try:
         processed_path = os.path.join(Config.PROCESSED_VIDEOS_FOLDER, f'processed_{filename}')
         if not os.path.exists(processed_path):
             return jsonify({'error': 'Processed video not found'}), 404
             
-        return send_file(processed_path, mimetype='video/mp4')
+        return send_media(processed_path, 'video/mp4', Config.MEDIA_NGINX_VIDEOS_PREFIX)
         
     except Exception as e:
         logger.error(f"Error serving processed video: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@video_bp.route('/processed/<filename>/hls/<name>')
+def serve_processed_hls(filename, name):
+    """Serve the HLS playlist or a segment of a processed video, while its job runs and after"""
+    path = os.path.join(hls_dir(filename), name)
+    if name == PLAYLIST_NAME:
+        if not os.path.exists(path):
+            return jsonify({'error': 'Playlist not available yet'}), 404
+        # The playlist grows while the job runs, so it must not be cached
+        response = send_file(path, mimetype='application/vnd.apple.mpegurl', max_age=0)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    if not SEGMENT_NAME_PATTERN.match(name) or not os.path.exists(path):
+        return jsonify({'error': 'Segment not found'}), 404
+    return send_media(path, 'video/mp2t')
+
 @video_bp.after_request
 def after_request(response):
     try:
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Range'
+        response.headers['Access-Control-Allow-Headers'] = MEDIA_ALLOW_HEADERS
+        response.headers['Access-Control-Expose-Headers'] = MEDIA_EXPOSE_HEADERS
         return response
     except Exception as e:
         logger.error(f"Error in after_request: {str(e)}")
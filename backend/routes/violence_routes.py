@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 import os
-from werkzeug.utils import secure_filename
 import cv2
 import numpy as np
 import time
 from flask_socketio import emit
+from utils.detection_utils import get_model
+from utils.sampling import SamplingPolicy
+from utils.uploads import stage_upload, discard_upload, release_upload
 
 violence_bp = Blueprint('violence', __name__)
 
@@ -40,6 +42,7 @@ def detect_violence():
             }), 400
         
         if not allowed_file(file.filename):
+            discard_upload(file)
             return jsonify({
                 'error': 'Invalid file type',
                 'details': f'Allowed types: {current_app.config["ALLOWED_EXTENSIONS"]}'
@@ -50,11 +53,9 @@ def detect_violence():
         if not os.path.exists(upload_folder):
             os.makedirs(upload_folder)
         
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(upload_folder, filename)
-        
         try:
-            file.save(filepath)
+            # Uses the file streamed in with the request instead of copying it
+            filepath = stage_upload(file, upload_folder)
         except Exception as e:
             return jsonify({
                 'error': 'Error saving file',
@@ -71,9 +72,23 @@ def detect_violence():
                 }), 400
             
             # Get video properties
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
+            fps = cap.get(cv2.CAP_PROP_FPS)
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
+            # Analyze one frame per second by default; the request may override this
+            sampling_params = {'sampling': 'time', 'rate': 1}
+            sampling_params.update({key: request.form[key] for key in SamplingPolicy.PARAMS if key in request.form})
+            try:
+                sampling = SamplingPolicy.from_params(sampling_params, fps)
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid sampling parameters',
+                    'details': str(e)
+                }), 400
+            
+            # Shared violence model, loaded on first use
+            violence_model = get_model('violence')
+            
             # Process frames
             violence_scores = []
             frame_count = 0
@@ -83,15 +98,18 @@ def detect_violence():
                 if not ret:
                     break
                 
-                # Process every nth frame (adjust based on performance needs)
-                if frame_count % fps == 0:
+                # Only analyze the frames selected by the sampling policy
+                if sampling.should_sample(frame_count):
                     # Preprocess frame
                     processed_frame = preprocess_frame(frame)
                     
                     # Get violence prediction
-                    prediction = current_app.config['VIOLENCE_MODEL'].predict(processed_frame)
+                    prediction = violence_model.predict(processed_frame)
                     violence_score = float(prediction[0][0])
                     violence_scores.append(violence_score)
+                    
+                    # Sample more densely around violent frames in adaptive mode
+                    sampling.observe(frame_count, [violence_score] if violence_score > 0.5 else [])
                 
                 frame_count += 1
             
@@ -111,6 +129,7 @@ def detect_violence():
                 'violence_score': avg_violence_score,
                 'processing_time': processing_time,
                 'total_frames_analyzed': len(violence_scores),
+                'sampling': sampling.describe(),
                 'total_frames': total_frames
             }
             
@@ -123,8 +142,7 @@ def detect_violence():
             }), 500
         finally:
             # Clean up
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            release_upload(filepath)
             if 'cap' in locals():
                 cap.release()
     
@@ -0,0 +1,132 @@
+"""Sweep torch/OpenCV thread settings and report detection latency.
+
+Every combination runs in a fresh process, because torch only accepts an
+inter-op thread count before it has done any parallel work. --concurrency
+simulates several request threads sharing one worker's model.
+
+Usage (from backend/):
+    python scripts/benchmark_threads.py --threads 1,2,4 --interop 1 --concurrency 1,4
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from config import Config
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def load_frames(images, count):
+    import cv2
+    import numpy as np
+
+    from utils.quantization import list_images
+
+    frames = [cv2.imread(path) for path in list_images(images, count)] if images else []
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        # Synthetic frames still exercise the full preprocessing and inference path
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+    return frames
+
+
+def run_child(args):
+    """Measure one setting in this process and print the result as JSON"""
+    from utils.cpu_config import configure_cpu, describe_topology
+
+    configure_cpu(num_threads=args.child_threads, interop_threads=args.child_interop,
+                  opencv_threads=args.child_opencv, affinity=args.affinity)
+
+    from utils.detection_utils import load_model, detect_weapons
+
+    model = load_model(args.model, backend=args.backend)
+    frames = load_frames(args.images, 8)
+    for frame in frames[:args.warmup]:
+        detect_weapons(model, frame)
+
+    def timed(i):
+        start = time.perf_counter()
+        detect_weapons(model, frames[i % len(frames)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.child_concurrency) as pool:
+        latencies = list(pool.map(timed, range(args.iterations)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    topology = describe_topology()
+    print(json.dumps({
+        'torch_threads': topology['torch_threads'],
+        'interop_threads': topology['torch_interop_threads'],
+        'opencv_threads': topology['opencv_threads'],
+        'concurrency': args.child_concurrency,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'throughput': len(latencies) / elapsed
+    }))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=Config.WEAPON_MODEL_PATH)
+    parser.add_argument('--backend', default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--images', default=None, help='Folder of sample images (default: synthetic frames)')
+    parser.add_argument('--threads', type=int_list, default=[1, 2, 4])
+    parser.add_argument('--interop', type=int_list, default=[1])
+    parser.add_argument('--opencv', type=int_list, default=[-1])
+    parser.add_argument('--concurrency', type=int_list, default=[1])
+    parser.add_argument('--affinity', default='', help="CPU list to pin to, e.g. '0-3'")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    # Internal: a single measurement in a child process
+    parser.add_argument('--child-threads', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-interop', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-opencv', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-concurrency', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_threads is not None:
+        return run_child(args)
+
+    print(f"{'threads':>8}{'interop':>8}{'opencv':>8}{'conc':>6}{'mean ms':>10}{'p95 ms':>10}{'img/s':>8}")
+    for threads, interop, opencv, concurrency in itertools.product(
+            args.threads, args.interop, args.opencv, args.concurrency):
+        command = [
+            sys.executable, os.path.abspath(__file__),
+            '--model', args.model, '--backend', args.backend, '--affinity', args.affinity,
+            '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+            '--child-threads', str(threads), '--child-interop', str(interop),
+            '--child-opencv', str(opencv), '--child-concurrency', str(concurrency)
+        ]
+        if args.images:
+            command += ['--images', args.images]
+
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{threads:>8}{interop:>8}{opencv:>8}{concurrency:>6}  failed: "
+                  f"{completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'unknown error'}")
+            continue
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{result['torch_threads']:>8}{result['interop_threads']:>8}{result['opencv_threads']:>8}"
+              f"{result['concurrency']:>6}{result['mean_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['throughput']:>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Check that an exported inference backend agrees with the PyTorch model.
+
+Runs both backends over a folder of images and matches every PyTorch box
+to a box of the same class from the other backend. The check fails if any
+box is unmatched, overlaps less than --min-iou, or differs in confidence
+by more than --conf-tolerance.
+
+Usage (from backend/):
+    python scripts/check_backend_parity.py --backend onnx --images ../datasets/test/images
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+import cv2
+import numpy as np
+
+from config import Config
+from utils.detection_utils import (
+    load_model, detect_weapons_batch, box_iou, get_model_backend, INFERENCE_BACKENDS
+)
+from utils.quantization import list_images
+
+
+def compare(reference, candidate, min_iou, conf_tolerance):
+    """Return a list of problems between two DETECTION_DTYPE arrays for one image"""
+    problems = []
+    used = set()
+    for det in reference:
+        same_class = [i for i, c in enumerate(candidate) if c['class_id'] == det['class_id'] and i not in used]
+        if not same_class:
+            problems.append(f"class {det['class_id']} box {det['bbox'].round(1).tolist()} missing")
+            continue
+
+        ious = box_iou(det['bbox'], candidate['bbox'][same_class])[0]
+        best = int(np.argmax(ious))
+        match = same_class[best]
+        used.add(match)
+
+        if ious[best] < min_iou:
+            problems.append(f"class {det['class_id']} box IoU {ious[best]:.3f} < {min_iou}")
+        conf_diff = abs(float(det['confidence']) - float(candidate[match]['confidence']))
+        if conf_diff > conf_tolerance:
+            problems.append(f"class {det['class_id']} confidence differs by {conf_diff:.3f}")
+
+    extra = len(candidate) - len(used)
+    if extra:
+        problems.append(f"{extra} extra box(es) from candidate backend")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=[b for b in INFERENCE_BACKENDS if b != 'torch'], default='onnx')
+    parser.add_argument('--model', default=Config.WEAPON_MODEL_PATH)
+    parser.add_argument('--images', default=os.path.join(Config.BASE_DIR, '..', 'datasets', 'test', 'images'))
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--conf', type=float, default=0.3, help='Detection confidence threshold')
+    parser.add_argument('--min-iou', type=float, default=0.9)
+    parser.add_argument('--conf-tolerance', type=float, default=0.05)
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.limit)
+    if not paths:
+        print(f"No images found in {args.images}")
+        return 2
+
+    reference_model = load_model(args.model, backend='torch')
+    candidate_model = load_model(args.model, backend=args.backend)
+    if get_model_backend(candidate_model) != args.backend:
+        print(f"The {args.backend} runtime is not installed")
+        return 2
+
+    failures = 0
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"SKIP {path}: could not read image")
+            continue
+        reference = detect_weapons_batch(reference_model, [image], args.conf, return_arrays=True)[0]
+        candidate = detect_weapons_batch(candidate_model, [image], args.conf, return_arrays=True)[0]
+
+        problems = compare(reference, candidate, args.min_iou, args.conf_tolerance)
+        if problems:
+            failures += 1
+            print(f"FAIL {os.path.basename(path)}: {'; '.join(problems)}")
+
+    print(f"{len(paths) - failures}/{len(paths)} images agree between torch and {args.backend}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Check that the email alert sink delivers through a local SMTP stand-in.
+
+Starts an aiosmtpd server on localhost, points the email settings at it
+(no TLS, no login), dispatches one alert through AlertDispatcher and
+EmailSink, and checks that exactly one message reached the admin address
+with the weapon in its subject. Nothing leaves the machine.
+
+Needs aiosmtpd (pip install aiosmtpd).
+
+Usage (from backend/):
+    python scripts/check_email_alerts.py
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+from email import message_from_bytes
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+SENDER = 'alerts@localhost'
+RECIPIENT = 'admin@localhost'
+
+
+class CollectingHandler:
+    """aiosmtpd handler that keeps every message it accepts"""
+
+    def __init__(self):
+        self.messages = []
+        self.received = threading.Event()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos), message_from_bytes(envelope.content)))
+        self.received.set()
+        return '250 Message accepted for delivery'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=0, help='SMTP port (0 = any free port)')
+    parser.add_argument('--timeout', type=float, default=15.0, help='Seconds to wait for delivery')
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("aiosmtpd is not installed (pip install aiosmtpd)")
+        return 2
+
+    port = args.port or free_port()
+    handler = CollectingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+
+    # Set before the notifier is created; load_dotenv() does not override these
+    os.environ.update({
+        'SMTP_SERVER': '127.0.0.1',
+        'SMTP_PORT': str(port),
+        'SMTP_USE_TLS': 'False',
+        'SENDER_EMAIL': SENDER,
+        'SENDER_PASSWORD': '',
+        'ADMIN_EMAIL': RECIPIENT
+    })
+    from utils.alerts import AlertDispatcher, EmailSink
+    from utils.email_utils import EmailNotifier
+
+    weapon_info = {
+        'name': 'Handgun',
+        'type': 'Firearm',
+        'description': 'Test alert from scripts/check_email_alerts.py',
+        'risk_factor': 'High',
+        'specifications': {},
+        'prevention_measures': ['None, this is a test']
+    }
+    dispatcher = AlertDispatcher([EmailSink(EmailNotifier(), risk_levels=['high'])], max_retries=1)
+    try:
+        queued = dispatcher.submit(
+            'handgun', 'check_email_alerts', weapon_info,
+            risk_assessment={'risk_level': 'High'}, confidence=0.9
+        )
+        if not queued:
+            print("FAIL: the alert was not routed to the email sink")
+            return 1
+        delivered = handler.received.wait(args.timeout)
+    finally:
+        dispatcher.stop()
+        controller.stop()
+
+    stats = dispatcher.stats()['sinks']['email']
+    if not delivered:
+        print(f"FAIL: nothing delivered within {args.timeout}s (sink stats: {stats})")
+        return 1
+
+    problems = []
+    if len(handler.messages) != 1:
+        problems.append(f"expected 1 message, got {len(handler.messages)}")
+    mail_from, rcpt_tos, message = handler.messages[0]
+    if mail_from != SENDER or rcpt_tos != [RECIPIENT]:
+        problems.append(f"envelope {mail_from} -> {rcpt_tos}, expected {SENDER} -> [{RECIPIENT}]")
+    if weapon_info['name'] not in (message['Subject'] or ''):
+        problems.append(f"subject {message['Subject']!r} does not name the weapon")
+    if problems:
+        print(f"FAIL: {'; '.join(problems)}")
+        return 1
+
+    print(f"OK: alert delivered to {RECIPIENT} ({message['Subject']}), "
+          f"send latency {stats['last_send_latency_ms']} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
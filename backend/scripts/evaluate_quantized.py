@@ -0,0 +1,137 @@
+"""Compare precision and recall of the INT8 weapon model against FP32.
+
+Both models run over the test split. Predictions are matched greedily,
+in confidence order, to ground-truth boxes of the same class at
+IoU >= --iou. Labels are in YOLO format: one .txt per image under a
+sibling 'labels' folder, with "<class_id> <x_center> <y_center> <w> <h>"
+lines normalised to the image size.
+
+Usage (from backend/):
+    python scripts/evaluate_quantized.py --split ../datasets/test
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+import cv2
+import numpy as np
+
+from config import Config
+from utils.detection_utils import load_model, detect_weapons_batch, box_iou, get_class_names
+from utils.quantization import list_images
+
+
+def load_labels(label_path, width, height):
+    """Ground-truth (class_ids, xyxy boxes) for one image"""
+    if not os.path.exists(label_path):
+        return np.zeros(0, dtype=np.int32), np.zeros((0, 4), dtype=np.float32)
+
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+    if rows.size == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros((0, 4), dtype=np.float32)
+    class_ids = rows[:, 0].astype(np.int32)
+    xc, yc, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return class_ids, np.stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2], axis=1)
+
+
+def count_matches(detections, gt_classes, gt_boxes, iou_threshold, counts):
+    """Accumulate per-class true positives, false positives and false negatives"""
+    matched = np.zeros(len(gt_classes), dtype=bool)
+    for det in detections[np.argsort(-detections['confidence'])]:
+        class_id = int(det['class_id'])
+        stats = counts.setdefault(class_id, {'tp': 0, 'fp': 0, 'fn': 0})
+        candidates = np.where((gt_classes == class_id) & ~matched)[0]
+        if len(candidates):
+            ious = box_iou(det['bbox'], gt_boxes[candidates])[0]
+            best = int(np.argmax(ious))
+            if ious[best] >= iou_threshold:
+                matched[candidates[best]] = True
+                stats['tp'] += 1
+                continue
+        stats['fp'] += 1
+
+    for class_id in gt_classes[~matched]:
+        counts.setdefault(int(class_id), {'tp': 0, 'fp': 0, 'fn': 0})['fn'] += 1
+
+
+def precision_recall(stats):
+    tp, fp, fn = stats['tp'], stats['fp'], stats['fn']
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return precision, recall
+
+
+def evaluate(model, paths, labels_dir, conf, iou_threshold):
+    counts = {}
+    inference_time = 0.0
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        height, width = image.shape[:2]
+
+        start = time.perf_counter()
+        detections = detect_weapons_batch(model, [image], conf, return_arrays=True)[0]
+        inference_time += time.perf_counter() - start
+
+        label_path = os.path.join(labels_dir, os.path.splitext(os.path.basename(path))[0] + '.txt')
+        gt_classes, gt_boxes = load_labels(label_path, width, height)
+        count_matches(detections, gt_classes, gt_boxes, iou_threshold, counts)
+
+    total = {key: sum(stats[key] for stats in counts.values()) for key in ('tp', 'fp', 'fn')}
+    return counts, total, inference_time / max(len(paths), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=Config.WEAPON_MODEL_PATH)
+    parser.add_argument('--split', default=os.path.join(Config.BASE_DIR, '..', 'datasets', 'test'),
+                        help="Folder with 'images' and 'labels' subfolders")
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--conf', type=float, default=0.35, help='Detection confidence threshold')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU needed to count a true positive')
+    parser.add_argument('--max-recall-drop', type=float, default=None,
+                        help='Exit with status 1 if overall recall drops by more than this')
+    args = parser.parse_args()
+
+    paths = list_images(os.path.join(args.split, 'images'), args.limit)
+    if not paths:
+        print(f"No images found in {os.path.join(args.split, 'images')}")
+        return 2
+    labels_dir = os.path.join(args.split, 'labels')
+
+    fp32_model = load_model(args.model, backend='torch')
+    int8_model = load_model(args.model, backend='onnx_int8')
+    class_names = get_class_names(fp32_model)
+
+    fp32_counts, fp32_total, fp32_time = evaluate(fp32_model, paths, labels_dir, args.conf, args.iou)
+    int8_counts, int8_total, int8_time = evaluate(int8_model, paths, labels_dir, args.conf, args.iou)
+
+    print(f"{len(paths)} images, conf >= {args.conf}, IoU >= {args.iou}\n")
+    print(f"{'class':<12}{'P fp32':>8}{'P int8':>8}{'dP':>8}{'R fp32':>8}{'R int8':>8}{'dR':>8}")
+    rows = [(class_names[c] if c < len(class_names) else str(c), fp32_counts.get(c), int8_counts.get(c))
+            for c in sorted(set(fp32_counts) | set(int8_counts))]
+    rows.append(('all', fp32_total, int8_total))
+    empty = {'tp': 0, 'fp': 0, 'fn': 0}
+    for name, fp32_stats, int8_stats in rows:
+        p32, r32 = precision_recall(fp32_stats or empty)
+        p8, r8 = precision_recall(int8_stats or empty)
+        print(f"{name:<12}{p32:>8.3f}{p8:>8.3f}{p8 - p32:>+8.3f}{r32:>8.3f}{r8:>8.3f}{r8 - r32:>+8.3f}")
+
+    print(f"\nAverage inference time: fp32 {fp32_time * 1000:.1f} ms, int8 {int8_time * 1000:.1f} ms "
+          f"({fp32_time / max(int8_time, 1e-9):.2f}x)")
+
+    recall_drop = precision_recall(fp32_total)[1] - precision_recall(int8_total)[1]
+    if args.max_recall_drop is not None and recall_drop > args.max_recall_drop:
+        print(f"Recall dropped by {recall_drop:.3f}, more than the allowed {args.max_recall_drop}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Build the INT8 ONNX weapon model used by the 'int8' model variant.
+
+The artifact is written next to the .pt file as <name>_int8.onnx, where
+load_model(..., backend='onnx_int8') and the 'weapon_int8' registry entry
+look for it. Check its accuracy with scripts/evaluate_quantized.py before
+enabling it for an endpoint.
+
+Usage (from backend/):
+    python scripts/quantize_model.py --mode static --calibration ../datasets/val/images
+"""
+import argparse
+import os
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from config import Config
+from utils.quantization import quantize_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=Config.WEAPON_MODEL_PATH)
+    parser.add_argument('--mode', choices=['static', 'dynamic'], default='static')
+    parser.add_argument('--calibration', default=os.path.join(Config.BASE_DIR, '..', 'datasets', 'val', 'images'),
+                        help='Folder of calibration images (static mode)')
+    parser.add_argument('--num-images', type=int, default=200)
+    parser.add_argument('--imgsz', type=int, default=Config.INFERENCE_IMGSZ)
+    args = parser.parse_args()
+
+    path = quantize_model(args.model, args.mode, args.calibration, args.num_images, args.imgsz)
+    print(f"INT8 model: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Inference server shared by all web workers on this machine.
+
+Start it before the web server, then run the workers with
+INFERENCE_MODE=remote:
+
+    python serve_models.py
+    INFERENCE_MODE=remote gunicorn -c gunicorn.conf.py wsgi:app
+
+For a pool, start several servers with different --address values and
+list them all, comma-separated, in INFERENCE_SERVER_ADDRESS.
+
+Clients authenticate with INFERENCE_SERVER_AUTHKEY; if it is not set, the
+first server to start writes a random key to INFERENCE_SERVER_KEY_FILE
+(mode 0600), which web workers running as the same user read.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from config import Config
+from utils.detection_utils import register_model_variants, get_model
+from utils.inference_server import InferenceServer, load_authkey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', default=Config.INFERENCE_SERVER_ADDRESS.split(',')[0].strip())
+    parser.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=Config.INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    register_model_variants()
+
+    # Load the default model before accepting clients; INT8 loads on first use
+    get_model('weapon')
+
+    server = InferenceServer(
+        args.address, load_authkey(create=True),
+        max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from config import Config
+from utils.email_utils import EmailNotifier
+from utils.realtime import socketio
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Risk levels that raise an alert unless a sink is configured otherwise
+DEFAULT_ALERT_RISK_LEVELS = ('high', 'critical')
+
+
+def alert_payload(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly view of an alert for sinks that serialize it"""
+    return {
+        'class': alert['class_name'],
+        'source': alert['source'],
+        'risk_level': alert['risk_level'],
+        'confidence': alert['confidence'],
+        'timestamp': alert['timestamp'],
+        'incident': alert['incident'],
+        'weapon_info': alert['weapon_info'],
+        'risk_assessment': alert['risk_assessment']
+    }
+
+
+class AlertSink(ABC):
+    """A destination for alerts.
+
+    ``risk_levels`` is the routing rule: a sink only receives alerts whose
+    risk level it lists. Sinks with a ``batch_window`` get every alert that
+    arrives within that many seconds in one ``send`` call.
+    """
+
+    name = 'sink'
+
+    def __init__(self, risk_levels: Iterable[str] = DEFAULT_ALERT_RISK_LEVELS, batch_window: float = 0.0):
+        self.risk_levels = {level.lower() for level in risk_levels}
+        self.batch_window = batch_window
+
+    def accepts(self, alert: Dict[str, Any]) -> bool:
+        return alert['risk_level'] in self.risk_levels
+
+    @abstractmethod
+    def send(self, alerts: List[Dict[str, Any]]):
+        """Deliver a batch of alerts; errors are raised so the worker can retry"""
+
+    def close(self):
+        pass
+
+
+class EmailSink(AlertSink):
+    """Digest emails over the notifier's pooled SMTP connection"""
+
+    name = 'email'
+
+    def __init__(self, notifier: Optional[EmailNotifier] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.notifier = notifier or EmailNotifier()
+
+    def send(self, alerts):
+        self.notifier.send_digest(alerts)
+
+    def close(self):
+        self.notifier.close()
+
+
+class WebhookSink(AlertSink):
+    """POSTs alerts as JSON to an HTTP endpoint"""
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def send(self, alerts):
+        response = self._session.post(
+            self.url,
+            json={'alerts': [alert_payload(alert) for alert in alerts]},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self._session.close()
+
+
+class SocketIOSink(AlertSink):
+    """Broadcasts a 'weapon_alert' event to every connected client"""
+
+    name = 'socketio'
+
+    def send(self, alerts):
+        for alert in alerts:
+            socketio.emit('weapon_alert', alert_payload(alert))
+
+
+class LogSink(AlertSink):
+    """Writes one JSON line per alert to a local file and/or syslog"""
+
+    name = 'log'
+
+    def __init__(self, path: Optional[str] = None, syslog_address: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._logger = logging.getLogger('weapon_alerts')
+        self._logger.setLevel(logging.INFO)
+        # Alerts go only to the handlers below, not the application log
+        self._logger.propagate = False
+        self._handlers = []
+
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._handlers.append(handler)
+        if syslog_address:
+            handler = logging.handlers.SysLogHandler(address=syslog_address)
+            handler.setFormatter(logging.Formatter('weapon-alert: %(message)s'))
+            self._handlers.append(handler)
+
+        for handler in self._handlers:
+            self._logger.addHandler(handler)
+
+    def send(self, alerts):
+        for alert in alerts:
+            self._logger.warning(json.dumps(alert_payload(alert), default=str))
+
+    def close(self):
+        for handler in self._handlers:
+            self._logger.removeHandler(handler)
+            handler.close()
+
+
+class SinkWorker:
+    """Background worker that delivers alerts to one sink.
+
+    Each sink has its own queue and thread, so a slow sink only delays
+    itself. Failed sends are retried with exponential backoff, and send
+    and end-to-end delivery latencies are tracked per sink.
+    """
+
+    def __init__(self, sink: AlertSink, max_retries: int = 3, retry_backoff: float = 2.0,
+                 max_queue: int = 1000):
+        self.sink = sink
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'alert-sink-{sink.name}', daemon=True)
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches_sent = 0
+        self.last_send_latency = 0.0
+        self.max_send_latency = 0.0
+        self.total_send_latency = 0.0
+        self.total_delivery_latency = 0.0
+
+        self._thread.start()
+
+    def put(self, alert: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.error(f"Alert queue for {self.sink.name} sink is full, dropping alert")
+            return False
+
+    def stop(self, timeout: float = 10.0):
+        """Deliver whatever is queued and stop the worker"""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.sink.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'risk_levels': sorted(self.sink.risk_levels),
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'batches_sent': self.batches_sent,
+                'queued': self._queue.qsize(),
+                'last_send_latency_ms': round(self.last_send_latency * 1000, 1),
+                'max_send_latency_ms': round(self.max_send_latency * 1000, 1),
+                'avg_send_latency_ms': (
+                    round(self.total_send_latency / self.batches_sent * 1000, 1) if self.batches_sent else 0.0
+                ),
+                'avg_delivery_latency_ms': (
+                    round(self.total_delivery_latency / self.sent * 1000, 1) if self.sent else 0.0
+                )
+            }
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Wait for an alert, then gather everything that arrives within the batch window"""
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.time() + self.sink.batch_window
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_with_retry(self, batch: List[Dict[str, Any]]):
+        delay = 1.0
+        for attempt in range(1, self.max_retries + 1):
+            start = time.time()
+            try:
+                self.sink.send(batch)
+            except Exception as e:
+                logger.error(f"Error sending alerts to {self.sink.name} sink "
+                             f"(attempt {attempt}/{self.max_retries}): {str(e)}")
+                if attempt < self.max_retries and not self._stop.wait(delay):
+                    delay *= self.retry_backoff
+                continue
+
+            now = time.time()
+            with self._lock:
+                self.sent += len(batch)
+                self.batches_sent += 1
+                self.last_send_latency = now - start
+                self.max_send_latency = max(self.max_send_latency, self.last_send_latency)
+                self.total_send_latency += self.last_send_latency
+                self.total_delivery_latency += sum(now - alert['timestamp'] for alert in batch)
+            return
+
+        with self._lock:
+            self.failed += len(batch)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if batch:
+                self._send_with_retry(batch)
+
+
+class AlertDispatcher:
+    """Fans weapon alerts out to every sink without blocking the detection path.
+
+    Each alert is routed to every sink whose risk levels match and handed
+    to that sink's worker. Deciding whether a detection deserves an alert
+    at all is the incident tracker's job, not the dispatcher's.
+    """
+
+    def __init__(self, sinks: List[AlertSink], max_retries: int = 3, retry_backoff: float = 2.0,
+                 max_queue: int = 1000):
+        self.workers = [
+            SinkWorker(sink, max_retries=max_retries, retry_backoff=retry_backoff, max_queue=max_queue)
+            for sink in sinks
+        ]
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.unrouted = 0
+
+    def submit(self, class_name: str, source: str, weapon_info: Dict[str, Any],
+               risk_assessment: Optional[Dict[str, Any]] = None, confidence: Optional[float] = None,
+               incident: Optional[Dict[str, Any]] = None) -> bool:
+        """Route an alert to the matching sinks; returns False if no sink took it"""
+        alert = {
+            'class_name': class_name,
+            'source': source,
+            'risk_level': (risk_assessment or {}).get('risk_level', '').lower(),
+            'weapon_info': weapon_info,
+            'risk_assessment': risk_assessment,
+            'confidence': confidence,
+            'incident': incident,
+            'timestamp': time.time()
+        }
+        workers = [worker for worker in self.workers if worker.sink.accepts(alert)]
+        if not workers:
+            with self._lock:
+                self.unrouted += 1
+            return False
+
+        with self._lock:
+            self.submitted += 1
+
+        queued = False
+        for worker in workers:
+            queued = worker.put(alert) or queued
+        return queued
+
+    def stop(self, timeout: float = 10.0):
+        for worker in self.workers:
+            worker.stop(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                'submitted': self.submitted,
+                'unrouted': self.unrouted
+            }
+        return {**counters, 'sinks': {worker.sink.name: worker.stats() for worker in self.workers}}
+
+
+def _risk_levels(sink_name: str) -> List[str]:
+    """Risk levels routed to a sink: ALERT_<SINK>_RISK_LEVELS, else ALERT_RISK_LEVELS"""
+    value = os.getenv(f'ALERT_{sink_name.upper()}_RISK_LEVELS', Config.ALERT_RISK_LEVELS)
+    return [level.strip() for level in value.split(',') if level.strip()]
+
+
+def create_sinks_from_config() -> List[AlertSink]:
+    """Build the sinks listed in Config.ALERT_SINKS"""
+    sinks: List[AlertSink] = []
+    for name in Config.ALERT_SINKS:
+        risk_levels = _risk_levels(name)
+        if name == 'email':
+            notifier = EmailNotifier()
+            if not notifier.is_configured():
+                logger.warning("Email alert sink enabled but SMTP settings are incomplete; email alerts are off")
+                continue
+            sinks.append(EmailSink(notifier, risk_levels=risk_levels, batch_window=Config.ALERT_BATCH_WINDOW))
+        elif name == 'webhook':
+            if not Config.ALERT_WEBHOOK_URL:
+                logger.warning("Webhook alert sink enabled but ALERT_WEBHOOK_URL is not set")
+                continue
+            sinks.append(WebhookSink(Config.ALERT_WEBHOOK_URL, timeout=Config.ALERT_WEBHOOK_TIMEOUT,
+                                     risk_levels=risk_levels))
+        elif name == 'socketio':
+            sinks.append(SocketIOSink(risk_levels=risk_levels))
+        elif name == 'log':
+            sinks.append(LogSink(path=Config.ALERT_LOG_PATH, syslog_address=Config.ALERT_SYSLOG_ADDRESS,
+                                 risk_levels=risk_levels))
+        else:
+            logger.warning(f"Unknown alert sink: {name}")
+    return sinks
+
+
+_dispatcher: Optional[AlertDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_alert_dispatcher() -> AlertDispatcher:
+    """Process-wide alert dispatcher shared by all blueprints"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AlertDispatcher(
+                    create_sinks_from_config(),
+                    max_retries=Config.ALERT_MAX_RETRIES
+                )
+    return _dispatcher
@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import cv2
+import torch
+
+from config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def parse_cpu_list(value: str) -> List[int]:
+    """Parse a CPU list such as '0-3,6' into [0, 1, 2, 3, 6]"""
+    cpus = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_index() -> Optional[int]:
+    """Index of this server worker, as set by the gunicorn post_fork hook"""
+    value = os.getenv('WORKER_INDEX')
+    return int(value) if value is not None and value.isdigit() else None
+
+
+def worker_cpus(cpus: List[int], index: int, workers: int) -> List[int]:
+    """Split the CPUs into equal contiguous slices, one per worker"""
+    workers = max(1, min(workers, len(cpus)))
+    per_worker = len(cpus) // workers
+    start = (index % workers) * per_worker
+    return cpus[start:start + per_worker]
+
+
+def configure_cpu(num_threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                  opencv_threads: Optional[int] = None, affinity: Optional[str] = None):
+    """Pin inference thread pools (and optionally CPU affinity) for this process.
+
+    Runs once per process. ``affinity`` is '' (leave alone), 'auto'
+    (give each worker an equal slice of the CPUs, using WORKER_INDEX and
+    WEB_CONCURRENCY) or an explicit CPU list like '0-3'. A torch thread
+    count of 0 means this worker's share of the CPUs; a negative OpenCV
+    thread count leaves OpenCV's default alone.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+
+        num_threads = Config.TORCH_NUM_THREADS if num_threads is None else num_threads
+        interop_threads = Config.TORCH_INTEROP_THREADS if interop_threads is None else interop_threads
+        opencv_threads = Config.OPENCV_NUM_THREADS if opencv_threads is None else opencv_threads
+        affinity = Config.CPU_AFFINITY if affinity is None else affinity
+
+        cpus = available_cpus()
+        if affinity and hasattr(os, 'sched_setaffinity'):
+            if affinity == 'auto':
+                index = worker_index()
+                if index is not None:
+                    cpus = worker_cpus(cpus, index, Config.WEB_CONCURRENCY)
+            else:
+                cpus = parse_cpu_list(affinity)
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                logger.warning(f"Could not set CPU affinity to {cpus}: {str(e)}")
+                cpus = available_cpus()
+        elif affinity:
+            logger.warning("CPU affinity is not supported on this platform")
+
+        if not num_threads:
+            # Without affinity, every worker sees all CPUs and has to share them
+            num_threads = len(cpus) if affinity else max(1, len(cpus) // max(1, Config.WEB_CONCURRENCY))
+        torch.set_num_threads(num_threads)
+        if interop_threads:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                # Only allowed before torch has started any parallel work
+                logger.warning(f"Could not set torch inter-op threads: {str(e)}")
+        if opencv_threads >= 0:
+            cv2.setNumThreads(opencv_threads)
+
+        logger.info(f"Inference CPU topology: {describe_topology()}")
+
+
+def describe_topology() -> Dict[str, Any]:
+    """Effective CPU and thread-pool settings of this process"""
+    return {
+        'pid': os.getpid(),
+        'worker_index': worker_index(),
+        'cpu_count': os.cpu_count(),
+        'cpus': available_cpus(),
+        'torch_threads': torch.get_num_threads(),
+        'torch_interop_threads': torch.get_num_interop_threads(),
+        'opencv_threads': cv2.getNumThreads()
+    }
@@ -3,67 +3,347 @@ import numpy as np
 from ultralytics import YOLO
 import os
 import logging
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Callable, Optional, Tuple
 import torch
 import time
+import threading
+import importlib.util
+
+from config import Config
+from utils.cpu_config import configure_cpu
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def load_model(model_path: str) -> YOLO:
-    """Load the YOLO model from the specified path."""
+# Inference backends: name -> (ultralytics export format, runtime module it needs).
+# 'onnx_int8' has no export format; its artifact comes from scripts/quantize_model.py
+INFERENCE_BACKENDS = {
+    'torch': (None, None),
+    'onnx': ('onnx', 'onnxruntime'),
+    'openvino': ('openvino', 'openvino'),
+    'onnx_int8': (None, 'onnxruntime')
+}
+
+# Model variants endpoints can choose between, and the registry name of each
+MODEL_VARIANTS = {
+    'fp32': 'weapon',
+    'int8': 'weapon_int8'
+}
+
+# Backend each loaded model runs on, keyed by id() of the model
+_model_backends: Dict[int, str] = {}
+_export_lock = threading.Lock()
+
+def exported_model_path(model_path: str, backend: str) -> str:
+    """Where the exported artifact for a backend lives, next to the .pt file."""
+    stem = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_openvino_model"
+    if backend == 'onnx_int8':
+        return f"{stem}_int8.onnx"
+    raise ValueError(f"Backend '{backend}' has no exported artifact")
+
+def export_model(model_path: str, backend: str, imgsz: int = 640) -> str:
+    """Export a .pt model for a backend once and return the cached artifact path.
+
+    The artifact is reused until the .pt file is newer than it.
+    """
+    export_path = exported_model_path(model_path, backend)
+    with _export_lock:
+        if os.path.exists(export_path) and os.path.getmtime(export_path) >= os.path.getmtime(model_path):
+            return export_path
+
+        logger.info(f"Exporting {model_path} to {backend} (imgsz={imgsz})")
+        start_time = time.time()
+        YOLO(model_path).export(format=INFERENCE_BACKENDS[backend][0], imgsz=imgsz, dynamic=True)
+        if not os.path.exists(export_path):
+            raise RuntimeError(f"Export to {backend} did not produce {export_path}")
+        logger.info(f"Exported {export_path} in {time.time() - start_time:.1f}s")
+        return export_path
+
+def resolve_backend(backend: str) -> str:
+    """Fall back to a backend whose runtime is installed."""
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    runtime = INFERENCE_BACKENDS[backend][1]
+    if runtime is None or importlib.util.find_spec(runtime) is not None:
+        return backend
+    if backend == 'onnx_int8':
+        # Silently running FP32 instead would hide the accuracy trade-off
+        raise RuntimeError(f"{runtime} is required for the {backend} backend")
+    fallback = 'onnx' if backend == 'openvino' else 'torch'
+    logger.warning(f"{runtime} is not installed, using the {fallback} backend instead of {backend}")
+    return resolve_backend(fallback)
+
+def model_name_for_variant(variant: str) -> str:
+    """Registry name of the weapon model for a variant ('fp32' or 'int8')."""
+    name = MODEL_VARIANTS.get(str(variant).lower())
+    if name is None:
+        raise ValueError(f"Unknown model variant: {variant}. Use one of: {', '.join(MODEL_VARIANTS)}")
+    return name
+
+def get_model_backend(model: Any) -> str:
+    """Name of the inference backend a model was loaded with."""
+    if getattr(model, 'remote', False):
+        return 'remote'
+    return _model_backends.get(id(model), 'torch')
+
+def load_model(model_path: str, backend: Optional[str] = None) -> YOLO:
+    """Load the YOLO model from the specified path.
+
+    ``backend`` (default Config.INFERENCE_BACKEND) selects PyTorch eager
+    mode or an exported ONNX Runtime / OpenVINO model. Exported models are
+    loaded through YOLO as well, so results have the same format.
+    """
     try:
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
         
-        logger.info(f"Loading model from: {model_path}")
-        
-        # Load the YOLO model
-        model = YOLO(model_path)
+        # Pin thread pools before the first inference creates them
+        configure_cpu()
         
-        # Set model to evaluation mode
-        model.eval()
+        backend = resolve_backend(backend or Config.INFERENCE_BACKEND)
         
-        # Force CPU usage
-        model.to('cpu')
+        if backend == 'torch':
+            logger.info(f"Loading model from: {model_path}")
+            
+            # Load the YOLO model
+            model = YOLO(model_path)
+            
+            # Set model to evaluation mode
+            model.eval()
+            
+            # Force CPU usage
+            model.to('cpu')
+        elif backend == 'onnx_int8':
+            export_path = exported_model_path(model_path, backend)
+            if not os.path.exists(export_path):
+                raise FileNotFoundError(
+                    f"Quantized model not found: {export_path}. Run scripts/quantize_model.py first"
+                )
+            logger.info(f"Loading {backend} model from: {export_path}")
+            model = YOLO(export_path, task='detect')
+        else:
+            export_path = export_model(model_path, backend, imgsz=Config.INFERENCE_IMGSZ)
+            logger.info(f"Loading {backend} model from: {export_path}")
+            
+            # Exported models already run on CPU in inference mode
+            model = YOLO(export_path, task='detect')
         
-        logger.info("Model loaded successfully")
+        _model_backends[id(model)] = backend
+        logger.info(f"Model loaded successfully ({backend} backend)")
         return model
     
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         raise
 
+# Process-wide model registry: name -> {'path', 'loader', 'model'}
+_model_registry: Dict[str, Dict[str, Any]] = {}
+_model_registry_lock = threading.Lock()
+
+def register_model(name: str, model_path: str, loader: Optional[Callable[[str], Any]] = None) -> None:
+    """Register a named model so it can be loaded lazily with get_model()."""
+    with _model_registry_lock:
+        entry = _model_registry.get(name)
+        if entry and entry['model'] is not None and entry['path'] != model_path:
+            logger.warning(f"Re-registering loaded model '{name}' with a new path: {model_path}")
+            entry['model'] = None
+        _model_registry[name] = {
+            'path': model_path,
+            'loader': loader or load_model,
+            'model': entry['model'] if entry and entry['path'] == model_path else None
+        }
+
+def get_model(name: str = 'weapon') -> Any:
+    """Return the named model, loading it on first use.
+
+    Each model is loaded at most once per process and shared by every caller.
+    """
+    entry = _model_registry.get(name)
+    if entry is None:
+        raise KeyError(f"No model registered under name: {name}")
+    if entry['model'] is not None:
+        return entry['model']
+
+    with _model_registry_lock:
+        # Another thread may have loaded it while we waited for the lock
+        if entry['model'] is None:
+            logger.info(f"Loading registered model '{name}'")
+            entry['model'] = entry['loader'](entry['path'])
+        return entry['model']
+
+def register_model_variants() -> None:
+    """Register the FP32 and INT8 weapon models under their variant names."""
+    register_model(MODEL_VARIANTS['fp32'], Config.WEAPON_MODEL_PATH)
+    register_model(MODEL_VARIANTS['int8'], Config.WEAPON_MODEL_PATH,
+                   loader=lambda path: load_model(path, backend='onnx_int8'))
+
+def is_model_loaded(name: str) -> bool:
+    """Check whether the named model has already been loaded."""
+    entry = _model_registry.get(name)
+    return entry is not None and entry['model'] is not None
+
+def load_violence_model(model_path: str) -> Any:
+    """Load the Keras violence classification model."""
+    try:
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+
+        logger.info(f"Loading violence model from: {model_path}")
+
+        # TensorFlow is only needed when the violence model is used
+        from tensorflow.keras.models import load_model as load_keras_model
+        model = load_keras_model(model_path)
+
+        logger.info("Violence model loaded successfully")
+        return model
+
+    except Exception as e:
+        logger.error(f"Error loading violence model: {str(e)}")
+        raise
+
+# One row per detected box: [x1, y1, x2, y2], confidence and class index
+DETECTION_DTYPE = np.dtype([
+    ('bbox', np.float32, (4,)),
+    ('confidence', np.float32),
+    ('class_id', np.int32)
+])
+
+# Class-name lookup arrays, keyed by id() of the model they were built from
+_class_names_cache: Dict[int, np.ndarray] = {}
+
+def get_class_names(model: Any) -> np.ndarray:
+    """Return an array mapping class index -> class name for the model."""
+    names = _class_names_cache.get(id(model))
+    if names is None:
+        model_names = model.names
+        if isinstance(model_names, dict):
+            size = max(model_names.keys(), default=-1) + 1
+            names = np.array([str(model_names.get(i, i)) for i in range(size)], dtype=object)
+        else:
+            names = np.array([str(name) for name in model_names], dtype=object)
+        _class_names_cache[id(model)] = names
+    return names
+
+def extract_detections(result: Any) -> np.ndarray:
+    """Convert one YOLO result into a DETECTION_DTYPE array.
+
+    All boxes are moved to NumPy in a single transfer instead of one
+    ``.cpu().numpy()`` call per coordinate.
+    """
+    data = result.boxes.data
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+    data = np.asarray(data, dtype=np.float32)
+
+    detections = np.empty(len(data), dtype=DETECTION_DTYPE)
+    if len(data):
+        # Columns are x1, y1, x2, y2, [track id,] confidence, class
+        detections['bbox'] = data[:, :4]
+        detections['confidence'] = data[:, -2]
+        detections['class_id'] = data[:, -1].astype(np.int32)
+    return detections
+
+def detections_to_dicts(detections: np.ndarray, class_names: np.ndarray) -> List[Dict[str, Any]]:
+    """Convert a DETECTION_DTYPE array into the JSON-friendly dict format."""
+    return [
+        {'class': name, 'confidence': confidence, 'bbox': bbox}
+        for name, confidence, bbox in zip(
+            class_names[detections['class_id']].tolist(),
+            detections['confidence'].tolist(),
+            detections['bbox'].tolist()
+        )
+    ]
+
+def letterbox(image: np.ndarray, size: int = 640, color: int = 114) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize keeping the aspect ratio and pad to a size x size square.
+
+    Returns the padded image, the scale applied and the (left, top)
+    padding, so boxes can be mapped back with (bbox - pad) / scale.
+    """
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    top = (size - new_height) // 2
+    left = (size - new_width) // 2
+    padded = cv2.copyMakeBorder(
+        resized, top, size - new_height - top, left, size - new_width - left,
+        cv2.BORDER_CONSTANT, value=(color, color, color)
+    )
+    return padded, scale, (left, top)
+
+def run_inference(
+    model: Any,
+    frames: List[np.ndarray],
+    conf_threshold: float = 0.3,
+    imgsz: Optional[int] = None
+) -> List[np.ndarray]:
+    """Run the model over frames and return one DETECTION_DTYPE array per frame.
+
+    A RemoteModel forwards the frames to the inference server, which
+    batches them with other workers' requests; any other model runs here.
+    """
+    if getattr(model, 'remote', False):
+        return model.detect(frames, conf_threshold, imgsz)
+    
+    kwargs = {'conf': conf_threshold}
+    if imgsz is not None:
+        kwargs['imgsz'] = imgsz
+    return [extract_detections(result) for result in model(list(frames), **kwargs)]
+
 def detect_weapons(model: YOLO, frame: np.ndarray, conf_threshold: float = 0.3) -> List[Dict[str, Any]]:
     """Detect weapons in a single frame."""
     try:
         # Run inference
-        results = model(frame, conf=conf_threshold)
+        detections = run_inference(model, [frame], conf_threshold)[0]
         
         # Process results
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0].cpu().numpy())
-                class_id = int(box.cls[0].cpu().numpy())
-                class_name = model.names[class_id]
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                })
-        
-        return detections
+        return detections_to_dicts(detections, get_class_names(model))
         
     except Exception as e:
         logger.error(f"Error in detect_weapons: {str(e)}")
         raise
 
+def detect_weapons_batch(
+    model: YOLO,
+    frames: List[np.ndarray],
+    conf_threshold: float = 0.3,
+    return_arrays: bool = False
+) -> List[Union[List[Dict[str, Any]], np.ndarray]]:
+    """Detect weapons in several frames with a single model call.
+
+    Returns one entry per input frame, in the same order as ``frames``, so
+    callers can map results back to their frame indices. Each entry is a
+    list of detection dicts, or a DETECTION_DTYPE array if ``return_arrays``
+    is set.
+    """
+    if not frames:
+        return []
+
+    try:
+        # Run inference on the whole batch at once
+        batch_detections = run_inference(model, frames, conf_threshold)
+        if not return_arrays:
+            class_names = get_class_names(model)
+            batch_detections = [detections_to_dicts(d, class_names) for d in batch_detections]
+
+        if len(batch_detections) != len(frames):
+            raise RuntimeError(
+                f"Model returned {len(batch_detections)} results for {len(frames)} frames"
+            )
+
+        return batch_detections
+
+    except Exception as e:
+        logger.error(f"Error in detect_weapons_batch: {str(e)}")
+        raise
+
 def process_detection(
     model: YOLO,
     image: np.ndarray,
@@ -73,24 +353,10 @@ def process_detection(
     """Process an image for weapon detection."""
     try:
         # Run inference
-        results = model(image, conf=conf_threshold, imgsz=max_size)
-        
-        # Process results
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0].cpu().numpy())
-                class_id = int(box.cls[0].cpu().numpy())
-                class_name = model.names[class_id]
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                })
+        detections = detections_to_dicts(
+            run_inference(model, [image], conf_threshold, imgsz=max_size)[0],
+            get_class_names(model)
+        )
         
         # Draw detections on the image
         processed_image = draw_detections(image, detections)
@@ -152,6 +418,7 @@ def process_video_detection(
         # Process video frames
         frame_count = 0
         detections = []
+        class_names = get_class_names(model)
         
         while True:
             ret, frame = cap.read()
@@ -160,24 +427,10 @@ def process_video_detection(
             
             try:
                 # Run inference on frame
-                results = model(frame, conf=conf_threshold, imgsz=max_size)
-                
-                # Process results
-                frame_detections = []
-                for result in results:
-                    boxes = result.boxes
-                    for box in boxes:
-                        # Get box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = float(box.conf[0].cpu().numpy())
-                        class_id = int(box.cls[0].cpu().numpy())
-                        class_name = model.names[class_id]
-                        
-                        frame_detections.append({
-                            'class': class_name,
-                            'confidence': confidence,
-                            'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                        })
+                frame_detections = detections_to_dicts(
+                    run_inference(model, [frame], conf_threshold, imgsz=max_size)[0],
+                    class_names
+                )
                 
                 # Draw detections on frame
                 processed_frame = draw_detections(frame, frame_detections)
@@ -243,4 +496,160 @@ def draw_detections(image: np.ndarray, detections: List[Dict[str, Any]]) -> np.n
         
     except Exception as e:
         logger.error(f"Error in draw_detections: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two sets of [x1, y1, x2, y2] boxes."""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+class IoUTracker:
+    """SORT-style tracker that links per-frame detections into object tracks.
+
+    Detections are matched to existing tracks of the same class by IoU, with
+    a centroid-distance fallback for objects that moved between sparsely
+    sampled frames. Each track keeps a constant-velocity estimate so boxes
+    can be predicted for frames that were not run through the detector.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 30, centroid_threshold: float = 0.5):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age  # Frames without a match before a track is closed
+        self.centroid_threshold = centroid_threshold  # Fraction of the box diagonal
+        self._next_id = 1
+        self._active: List[Dict[str, Any]] = []
+        self._finished: List[Dict[str, Any]] = []
+
+    def update(self, frame_index: int, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Match a frame's detections to tracks and tag each with a 'track_id'."""
+        self._expire(frame_index)
+
+        unmatched = list(range(len(detections)))
+        for class_name in {det['class'] for det in detections}:
+            det_indices = [i for i in unmatched if detections[i]['class'] == class_name]
+            tracks = [t for t in self._active if t['class'] == class_name and t['last_frame'] < frame_index]
+            if not tracks:
+                continue
+
+            det_boxes = np.array([detections[i]['bbox'] for i in det_indices], dtype=np.float32)
+            track_boxes = np.array([self._predict_box(t, frame_index) for t in tracks], dtype=np.float32)
+            scores = box_iou(track_boxes, det_boxes)
+
+            # Centroid fallback for pairs that no longer overlap enough
+            centers_t = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            centers_d = (det_boxes[:, :2] + det_boxes[:, 2:]) / 2
+            diagonals = np.linalg.norm(track_boxes[:, 2:] - track_boxes[:, :2], axis=1)
+            distances = np.linalg.norm(centers_t[:, None, :] - centers_d[None, :, :], axis=2)
+            close = distances < self.centroid_threshold * diagonals[:, None]
+            scores = np.where((scores < self.iou_threshold) & close, self.iou_threshold, scores)
+
+            # Greedy assignment, best matches first
+            for flat_index in np.argsort(-scores, axis=None):
+                t_idx, d_idx = np.unravel_index(flat_index, scores.shape)
+                if scores[t_idx, d_idx] < self.iou_threshold:
+                    break
+                if np.isnan(scores[t_idx, d_idx]):
+                    continue
+                self._extend(tracks[t_idx], frame_index, detections[det_indices[d_idx]])
+                unmatched.remove(det_indices[d_idx])
+                scores[t_idx, :] = np.nan
+                scores[:, d_idx] = np.nan
+
+        for i in unmatched:
+            self._start(frame_index, detections[i])
+
+        return detections
+
+    def predict(self, frame_index: int, min_last_frame: int = -1) -> List[Dict[str, Any]]:
+        """Estimate the boxes of active tracks at a frame that was not inferred.
+
+        Only tracks matched at or after ``min_last_frame`` are returned, so
+        objects that were missing from the last inferred frame are not drawn.
+        """
+        return [
+            {
+                'class': track['class'],
+                'confidence': track['last_confidence'],
+                'bbox': [float(x) for x in self._predict_box(track, frame_index)],
+                'track_id': track['track_id']
+            }
+            for track in self._active
+            if track['last_frame'] >= min_last_frame and frame_index - track['last_frame'] <= self.max_age
+        ]
+
+    def pop_finished(self) -> List[Dict[str, Any]]:
+        """Return records of tracks closed so far and forget them.
+
+        Long-running sources call this regularly to keep memory bounded.
+        """
+        records = [self._record(t) for t in self._finished]
+        self._finished = []
+        return records
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Close all tracks and return one record per track, ordered by ID."""
+        self._finished.extend(self._active)
+        self._active = []
+        return sorted((self._record(t) for t in self._finished), key=lambda r: r['track_id'])
+
+    def _start(self, frame_index: int, detection: Dict[str, Any]):
+        track = {
+            'track_id': self._next_id,
+            'class': detection['class'],
+            'first_frame': frame_index,
+            'last_frame': frame_index,
+            'hits': 1,
+            'max_confidence': detection['confidence'],
+            'last_confidence': detection['confidence'],
+            'box': np.asarray(detection['bbox'], dtype=np.float32),
+            'velocity': np.zeros(4, dtype=np.float32)
+        }
+        self._next_id += 1
+        self._active.append(track)
+        detection['track_id'] = track['track_id']
+
+    def _extend(self, track: Dict[str, Any], frame_index: int, detection: Dict[str, Any]):
+        box = np.asarray(detection['bbox'], dtype=np.float32)
+        elapsed = frame_index - track['last_frame']
+        velocity = (box - track['box']) / elapsed
+        # Smooth the velocity so one noisy box does not throw off predictions
+        track['velocity'] = 0.5 * track['velocity'] + 0.5 * velocity if track['hits'] > 1 else velocity
+        track['box'] = box
+        track['last_frame'] = frame_index
+        track['hits'] += 1
+        track['last_confidence'] = detection['confidence']
+        track['max_confidence'] = max(track['max_confidence'], detection['confidence'])
+        detection['track_id'] = track['track_id']
+
+    def _predict_box(self, track: Dict[str, Any], frame_index: int) -> np.ndarray:
+        return track['box'] + track['velocity'] * (frame_index - track['last_frame'])
+
+    def _expire(self, frame_index: int):
+        still_active = []
+        for track in self._active:
+            if frame_index - track['last_frame'] > self.max_age:
+                self._finished.append(track)
+            else:
+                still_active.append(track)
+        self._active = still_active
+
+    @staticmethod
+    def _record(track: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'track_id': track['track_id'],
+            'class': track['class'],
+            'first_frame': track['first_frame'],
+            'last_frame': track['last_frame'],
+            'hits': track['hits'],
+            'max_confidence': track['max_confidence']
+        }
@@ -5,6 +5,8 @@ from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 import logging
 import ssl
+import threading
+from datetime import datetime
 
 # Load environment variables
 load_dotenv()
@@ -17,87 +19,184 @@ class EmailNotifier:
     def __init__(self):
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('SMTP_PORT', 587))
+        self.smtp_use_tls = os.getenv('SMTP_USE_TLS', 'True').lower() == 'true'
         self.sender_email = os.getenv('SENDER_EMAIL')
         self.sender_password = os.getenv('SENDER_PASSWORD')
         self.admin_email = os.getenv('ADMIN_EMAIL')
-        
+
+        # Authenticated connection reused across alerts
+        self._server = None
+        self._server_lock = threading.Lock()
+
         if not all([self.sender_email, self.sender_password, self.admin_email]):
             logger.warning("Email configuration is incomplete. Email notifications will not work.")
             logger.warning("Please check your .env file and ensure all email settings are configured.")
-    
-    def send_weapon_alert(self, weapon_info, detection_source):
-        """Send an email alert about a high-risk weapon detection"""
+
+    def is_configured(self):
+        """Check whether enough settings are present to send email"""
+        # A local relay without TLS does not need a password
+        if not self.smtp_use_tls:
+            return bool(self.sender_email and self.admin_email)
+        return all([self.sender_email, self.sender_password, self.admin_email])
+
+    def _log_missing_configuration(self):
+        logger.error("Email configuration is incomplete. Cannot send alert.")
+        logger.error("Missing configuration: " +
+                   ", ".join([k for k, v in {
+                       'SENDER_EMAIL': self.sender_email,
+                       'SENDER_PASSWORD': self.sender_password,
+                       'ADMIN_EMAIL': self.admin_email
+                   }.items() if not v]))
+
+    def _connect(self):
+        """Open a new SMTP connection and authenticate"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        server.ehlo()
+        if self.smtp_use_tls:
+            # Create SSL context
+            context = ssl.create_default_context()
+            server.starttls(context=context)
+            server.ehlo()
+        if self.sender_password:
+            server.login(self.sender_email, self.sender_password)
+        return server
+
+    def _get_connection(self):
+        """Return the pooled connection, reconnecting if the server dropped it"""
+        if self._server is not None:
+            try:
+                status, _ = self._server.noop()
+                if status == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._close_connection()
+
+        self._server = self._connect()
+        return self._server
+
+    def _close_connection(self):
+        if self._server is None:
+            return
         try:
-            if not all([self.sender_email, self.sender_password, self.admin_email]):
-                logger.error("Email configuration is incomplete. Cannot send alert.")
-                logger.error("Missing configuration: " + 
-                           ", ".join([k for k, v in {
-                               'SENDER_EMAIL': self.sender_email,
-                               'SENDER_PASSWORD': self.sender_password,
-                               'ADMIN_EMAIL': self.admin_email
-                           }.items() if not v]))
-                return False
-            
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = self.admin_email
-            msg['Subject'] = f"High Risk Weapon Alert: {weapon_info['name']}"
-            
-            # Create email body
-            body = f"""
-            High Risk Weapon Detected!
-            
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+    def close(self):
+        """Close the pooled SMTP connection"""
+        with self._server_lock:
+            self._close_connection()
+
+    def send_message(self, msg):
+        """Send a message over the pooled connection; errors are raised to the caller"""
+        with self._server_lock:
+            try:
+                self._get_connection().send_message(msg)
+            except Exception:
+                # Never reuse a connection in an unknown state
+                self._close_connection()
+                raise
+
+    def _format_weapon_details(self, weapon_info, detection_source):
+        return f"""
             Weapon Details:
             - Name: {weapon_info['name']}
             - Type: {weapon_info['type']}
             - Description: {weapon_info['description']}
             - Risk Level: {weapon_info['risk_factor']}
-            
+
             Detection Source: {detection_source}
-            
+
             Specifications:
             - Model: {weapon_info['specifications'].get('model', 'Unknown')}
             - Caliber/Size: {weapon_info['specifications'].get('caliber_or_size', 'Unknown')}
             - Effective Range: {weapon_info['specifications'].get('effective_range', 'Unknown')}
-            
+
             Prevention Measures:
             {chr(10).join(f'- {measure}' for measure in weapon_info['prevention_measures'])}
-            
+            """
+
+    def _create_message(self, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email
+        msg['To'] = self.admin_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def send_weapon_alert(self, weapon_info, detection_source):
+        """Send an email alert about a high-risk weapon detection"""
+        try:
+            if not self.is_configured():
+                self._log_missing_configuration()
+                return False
+
+            # Create email body
+            body = f"""
+            High Risk Weapon Detected!
+            {self._format_weapon_details(weapon_info, detection_source)}
             Please take appropriate action immediately.
             """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Create SSL context
-            context = ssl.create_default_context()
-            
+            msg = self._create_message(f"High Risk Weapon Alert: {weapon_info['name']}", body)
+
             # Send email with better error handling
             try:
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.ehlo()
-                    server.starttls(context=context)
-                    server.ehlo()
-                    server.login(self.sender_email, self.sender_password)
-                    server.send_message(msg)
-                
+                self.send_message(msg)
+
                 logger.info(f"Email alert sent successfully for weapon: {weapon_info['name']}")
                 return True
-                
+
             except smtplib.SMTPAuthenticationError as e:
                 logger.error(f"SMTP Authentication Error: {str(e)}")
                 logger.error("Please check your email credentials in the .env file.")
                 logger.error("For Gmail, make sure you're using an App Password, not your regular password.")
                 return False
-                
+
             except smtplib.SMTPException as e:
                 logger.error(f"SMTP Error: {str(e)}")
                 return False
-                
+
             except Exception as e:
                 logger.error(f"Unexpected error while sending email: {str(e)}")
                 return False
-            
+
         except Exception as e:
             logger.error(f"Error preparing email alert: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    def send_digest(self, alerts):
+        """Send several alerts as one email; errors are raised so the caller can retry
+
+        Each alert is a dict with 'weapon_info', 'source' and 'timestamp' keys,
+        and optionally the 'incident' it was raised for.
+        """
+        if not self.is_configured():
+            self._log_missing_configuration()
+            raise RuntimeError("Email configuration is incomplete")
+
+        if len(alerts) == 1:
+            subject = f"High Risk Weapon Alert: {alerts[0]['weapon_info']['name']}"
+        else:
+            names = sorted({alert['weapon_info']['name'] for alert in alerts})
+            subject = f"High Risk Weapon Alerts ({len(alerts)}): {', '.join(names)}"
+
+        sections = []
+        for alert in alerts:
+            detected_at = datetime.fromtimestamp(alert['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            incident_id = (alert.get('incident') or {}).get('incident_id', 'Unknown')
+            sections.append(f"""
+            Detected at: {detected_at}
+            Incident: {incident_id}
+            {self._format_weapon_details(alert['weapon_info'], alert['source'])}""")
+
+        body = f"""
+            High Risk Weapon Detected!
+            {''.join(sections)}
+            Please take appropriate action immediately.
+            """
+        self.send_message(self._create_message(subject, body))
+        logger.info(f"Email digest sent with {len(alerts)} alert(s)")
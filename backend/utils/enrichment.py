@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils.weapon_info import WeaponInfo
+from utils.weapon_cache import LRUTTLCache, confidence_bucket
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentStore:
+    """SQLite-backed cache of enrichment results with a time-to-live.
+
+    Every call opens a short-lived connection, so the store can be shared by
+    threads and by every worker process on the node.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS enrichment ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored value, or None if it is missing or expired"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT value, updated_at FROM enrichment WHERE key = ?', (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading enrichment cache: {str(e)}")
+            return None
+
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO enrichment (key, value, updated_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error writing enrichment cache: {str(e)}")
+
+
+class WeaponEnricher:
+    """Returns weapon info and risk assessments without blocking the caller.
+
+    Results live in one bounded LRU + TTL cache, optionally backed by the
+    persistent store. Weapon info is keyed by class; risk assessments are
+    keyed by class and confidence bucket, since the assessment depends on
+    the confidence it was requested with. Anything not cached yet is
+    answered with FALLBACK_DATABASE data while the Gemini lookup runs on a
+    background executor.
+    """
+
+    def __init__(self, weapon_info: Optional[WeaponInfo] = None, store: Optional[EnrichmentStore] = None,
+                 max_entries: int = 256, ttl: float = 24 * 3600, bucket_width: float = 0.25,
+                 max_workers: int = 1, retry_delay: float = 300, miss_ttl: float = 30):
+        self.weapon_info = weapon_info or WeaponInfo()
+        self.cache = LRUTTLCache(max_entries=max_entries, ttl=ttl, backing_store=store, miss_ttl=miss_ttl)
+        self.bucket_width = bucket_width
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+        self._pending = set()
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def info_key(class_name: str) -> str:
+        return f"info:{class_name.lower()}"
+
+    def risk_key(self, class_name: str, confidence: Optional[float]) -> str:
+        return f"risk:{class_name.lower()}:{confidence_bucket(confidence, self.bucket_width)}"
+
+    def get(self, class_name: str, confidence: Optional[float] = None) -> Dict[str, Any]:
+        """Return {'info', 'risk_assessment', 'enriched'} for a class immediately"""
+        info_key = self.info_key(class_name)
+        risk_key = self.risk_key(class_name, confidence)
+        info = self.cache.get(info_key)
+        risk_assessment = self.cache.get(risk_key)
+
+        if info is None:
+            self._schedule(info_key, self._fetch_info, class_name)
+        if risk_assessment is None:
+            self._schedule(risk_key, self._fetch_risk, class_name, confidence)
+
+        return {
+            'info': info if info is not None else WeaponInfo.fallback_weapon_info(class_name),
+            'risk_assessment': (
+                risk_assessment if risk_assessment is not None
+                else WeaponInfo.fallback_risk_assessment(class_name)
+            ),
+            'enriched': info is not None and risk_assessment is not None
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {**self.cache.stats(), 'pending_lookups': pending}
+
+    def _fetch_info(self, class_name: str) -> Dict[str, Any]:
+        return self.weapon_info.get_weapon_info(class_name, fallback_on_error=False)
+
+    def _fetch_risk(self, class_name: str, confidence: Optional[float]) -> Dict[str, Any]:
+        return self.weapon_info.get_risk_assessment(class_name, confidence, fallback_on_error=False)
+
+    def _schedule(self, key: str, fetch, *args):
+        with self._lock:
+            if key in self._pending:
+                return
+            # Do not hammer the API for lookups that just failed
+            if time.time() - self._failed_at.get(key, 0) < self.retry_delay:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._enrich, key, fetch, *args)
+
+    def _enrich(self, key: str, fetch, *args):
+        try:
+            self.cache.set(key, fetch(*args))
+            with self._lock:
+                self._failed_at.pop(key, None)
+            logger.info(f"Enriched {key}")
+        except Exception as e:
+            with self._lock:
+                self._failed_at[key] = time.time()
+            logger.error(f"Error enriching {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+_enricher: Optional[WeaponEnricher] = None
+_enricher_lock = threading.Lock()
+
+
+def get_enricher() -> WeaponEnricher:
+    """Process-wide enricher shared by all blueprints"""
+    global _enricher
+    if _enricher is None:
+        with _enricher_lock:
+            if _enricher is None:
+                store = None
+                if Config.WEAPON_CACHE_SHARED:
+                    store = EnrichmentStore(Config.ENRICHMENT_CACHE_PATH, Config.ENRICHMENT_CACHE_TTL)
+                _enricher = WeaponEnricher(
+                    store=store,
+                    max_entries=Config.WEAPON_CACHE_MAX_ENTRIES,
+                    ttl=Config.WEAPON_CACHE_TTL,
+                    miss_ttl=Config.WEAPON_CACHE_MISS_TTL,
+                    bucket_width=Config.RISK_CONFIDENCE_BUCKET
+                )
+    return _enricher
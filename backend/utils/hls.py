@@ -0,0 +1,135 @@
+import logging
+import math
+import os
+import re
+import subprocess
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = 'playlist.m3u8'
+SEGMENT_NAME_PATTERN = re.compile(r'^segment_\d{5}\.ts$')
+
+
+class SegmentingVideoWriter:
+    """cv2.VideoWriter look-alike that writes a video as HLS segments.
+
+    Each frame is encoded once, into the current MPEG-TS segment (itself a
+    cv2.VideoWriter). After ``segment_seconds`` of video the segment is
+    closed and added to an EVENT playlist, so players can start watching
+    while the rest is still being processed. ``release()`` closes the last
+    segment and ends the playlist; ``remux()`` then joins the segments into
+    a regular MP4 with ffmpeg, copying the stream instead of encoding again.
+
+    Each segment starts at timestamp zero, so segments are separated by
+    EXT-X-DISCONTINUITY tags.
+    """
+
+    def __init__(self, fourcc: int, fps: float, frame_size: Tuple[int, int], segment_dir: str,
+                 segment_seconds: float = 4.0, on_segment: Optional[Callable[[str, int], None]] = None):
+        self.fourcc = fourcc
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.frame_size = frame_size
+        self.segment_dir = segment_dir
+        self.frames_per_segment = max(1, round(segment_seconds * self.fps))
+        self.target_duration = math.ceil(self.frames_per_segment / self.fps)
+        self.on_segment = on_segment
+        self.playlist_path = os.path.join(segment_dir, PLAYLIST_NAME)
+        os.makedirs(segment_dir, exist_ok=True)
+
+        self.segments: List[Tuple[str, float]] = []
+        self._segment: Optional[cv2.VideoWriter] = None
+        self._segment_name: Optional[str] = None
+        self._segment_frames = 0
+
+        # Open the first segment now, so isOpened() reports whether OpenCV can write MPEG-TS
+        self._open_segment()
+
+    def isOpened(self) -> bool:
+        return self._segment is not None or bool(self.segments)
+
+    def write(self, frame: np.ndarray):
+        if self._segment is None:
+            self._open_segment()
+            if self._segment is None:
+                raise RuntimeError(f"Cannot open HLS segment in {self.segment_dir}")
+        self._segment.write(frame)
+        self._segment_frames += 1
+        if self._segment_frames >= self.frames_per_segment:
+            self._close_segment()
+
+    def release(self):
+        if self._segment is not None:
+            if self._segment_frames:
+                self._close_segment()
+            else:
+                # Opened but never written to
+                self._segment.release()
+                self._segment = None
+                os.remove(os.path.join(self.segment_dir, self._segment_name))
+        if self.segments:
+            self._write_playlist(finished=True)
+
+    def remux(self, output_path: str, ffmpeg: str = 'ffmpeg', timeout: float = 600):
+        """Join the finished segments into one MP4 without re-encoding"""
+        list_path = os.path.join(self.segment_dir, 'concat.txt')
+        with open(list_path, 'w') as f:
+            for name, _ in self.segments:
+                f.write(f"file '{name}'\n")
+        try:
+            completed = subprocess.run(
+                [ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+                 '-c', 'copy', '-movflags', '+faststart', output_path],
+                capture_output=True, text=True, timeout=timeout
+            )
+        finally:
+            os.remove(list_path)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Error joining HLS segments: {completed.stderr.strip()[-500:]}")
+
+    def _open_segment(self):
+        name = f"segment_{len(self.segments):05d}.ts"
+        segment = cv2.VideoWriter(
+            os.path.join(self.segment_dir, name), cv2.CAP_FFMPEG, self.fourcc, self.fps, self.frame_size
+        )
+        if not segment.isOpened():
+            logger.error(f"Cannot write HLS segments to {self.segment_dir}")
+            return
+        self._segment = segment
+        self._segment_name = name
+        self._segment_frames = 0
+
+    def _close_segment(self):
+        self._segment.release()
+        self.segments.append((self._segment_name, self._segment_frames / self.fps))
+        self._segment = None
+        self._write_playlist(finished=False)
+        if self.on_segment:
+            self.on_segment(os.path.join(self.segment_dir, self._segment_name), len(self.segments))
+
+    def _write_playlist(self, finished: bool):
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            f'#EXT-X-TARGETDURATION:{self.target_duration}',
+            '#EXT-X-MEDIA-SEQUENCE:0',
+            '#EXT-X-PLAYLIST-TYPE:EVENT'
+        ]
+        for i, (name, duration) in enumerate(self.segments):
+            if i:
+                lines.append('#EXT-X-DISCONTINUITY')
+            lines.append(f'#EXTINF:{duration:.3f},')
+            lines.append(name)
+        if finished:
+            lines.append('#EXT-X-ENDLIST')
+
+        # Players poll the playlist, so it must never be seen half written
+        tmp_path = f"{self.playlist_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.playlist_path)
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Incident:
+    """Detections of one class from one source with no gap longer than the window"""
+
+    __slots__ = ('id', 'class_name', 'source', 'started_at', 'last_seen',
+                 'detections', 'max_confidence', 'alerted')
+
+    def __init__(self, class_name: str, source: str, timestamp: float):
+        self.id = uuid.uuid4().hex
+        self.class_name = class_name
+        self.source = source
+        self.started_at = timestamp
+        self.last_seen = timestamp
+        self.detections = 0
+        self.max_confidence = 0.0
+        self.alerted = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'incident_id': self.id,
+            'class': self.class_name,
+            'source': self.source,
+            'started_at': self.started_at,
+            'last_seen': self.last_seen,
+            'detections': self.detections,
+            'max_confidence': self.max_confidence,
+            'alerted': self.alerted
+        }
+
+
+class IncidentTracker:
+    """Groups the detection stream into incidents, one alert decision each.
+
+    Incidents are keyed by (source, class) in an OrderedDict kept in
+    last-seen order, so finding an incident, extending it and expiring
+    stale ones from the front are all O(1) amortized per detection. The
+    index holds at most ``max_incidents`` open incidents; beyond that the
+    least recently seen is closed early.
+    """
+
+    def __init__(self, window: float = 60.0, max_incidents: int = 10000):
+        self.window = window
+        self.max_incidents = max_incidents
+        self._open: 'OrderedDict[Tuple[str, str], Incident]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.incidents_opened = 0
+        self.incidents_expired = 0
+        self.incidents_evicted = 0
+        self.incidents_alerted = 0
+
+    def observe(self, class_name: str, source: str, confidence: float = 0.0,
+                timestamp: Optional[float] = None) -> Incident:
+        """Record a detection and return the incident it belongs to"""
+        now = time.time() if timestamp is None else timestamp
+        key = (source, class_name.lower())
+        with self._lock:
+            self._expire_locked(now)
+
+            incident = self._open.get(key)
+            if incident is None:
+                incident = Incident(class_name, source, now)
+                self._open[key] = incident
+                self.incidents_opened += 1
+                while len(self._open) > self.max_incidents:
+                    self._open.popitem(last=False)
+                    self.incidents_evicted += 1
+            else:
+                self._open.move_to_end(key)
+
+            incident.last_seen = max(incident.last_seen, now)
+            incident.detections += 1
+            incident.max_confidence = max(incident.max_confidence, float(confidence or 0.0))
+            return incident
+
+    def alert_once(self, incident: Incident, send: Callable[[Incident], bool]) -> bool:
+        """Call ``send`` unless the incident has already alerted; True if it alerted now
+
+        ``send`` must not block, since it runs under the tracker lock so that
+        two threads never alert the same incident.
+        """
+        with self._lock:
+            if incident.alerted or not send(incident):
+                return False
+            incident.alerted = True
+            self.incidents_alerted += 1
+            return True
+
+    def _expire_locked(self, now: float):
+        """Close incidents whose last detection is older than the window"""
+        while self._open:
+            key, incident = next(iter(self._open.items()))
+            if now - incident.last_seen <= self.window:
+                break
+            del self._open[key]
+            self.incidents_expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'open_incidents': len(self._open),
+                'max_incidents': self.max_incidents,
+                'window_seconds': self.window,
+                'incidents_opened': self.incidents_opened,
+                'incidents_alerted': self.incidents_alerted,
+                'incidents_expired': self.incidents_expired,
+                'incidents_evicted': self.incidents_evicted
+            }
+
+
+_tracker: Optional[IncidentTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_incident_tracker() -> IncidentTracker:
+    """Process-wide incident tracker shared by all blueprints"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = IncidentTracker(
+                    window=Config.INCIDENT_WINDOW,
+                    max_incidents=Config.MAX_OPEN_INCIDENTS
+                )
+    return _tracker
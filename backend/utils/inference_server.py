@@ -0,0 +1,327 @@
+import itertools
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from utils.detection_utils import get_model, run_inference
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """Key that authenticates web workers to the inference server.
+
+    Clients can send pickled data, so there is no default key:
+    INFERENCE_SERVER_AUTHKEY wins, otherwise the key is read from
+    INFERENCE_SERVER_KEY_FILE. With ``create`` (the server), a missing file
+    is created with a random key, readable only by its owner.
+    """
+    if Config.INFERENCE_SERVER_AUTHKEY:
+        return Config.INFERENCE_SERVER_AUTHKEY.encode()
+
+    path = Config.INFERENCE_SERVER_KEY_FILE
+    if create and not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        logger.info(f"Generated inference server key in {path}")
+
+    try:
+        with open(path) as f:
+            key = f.read().strip()
+    except OSError as e:
+        raise RuntimeError(
+            f"No inference server key: set INFERENCE_SERVER_AUTHKEY or start serve_models.py "
+            f"to create {path} ({str(e)})"
+        )
+    if not key:
+        raise RuntimeError(f"Inference server key file {path} is empty")
+    return key.encode()
+
+
+class _InferenceRequest:
+    """Frames from one client call, waiting to be batched"""
+
+    __slots__ = ('request_id', 'frames', 'conf', 'imgsz', 'conn', 'send_lock', 'received_at')
+
+    def __init__(self, request_id, frames, conf, imgsz, conn, send_lock):
+        self.request_id = request_id
+        self.frames = frames
+        self.conf = conf
+        self.imgsz = imgsz
+        self.conn = conn
+        self.send_lock = send_lock
+        self.received_at = time.time()
+
+    def reply(self, status: str, payload: Any):
+        try:
+            with self.send_lock:
+                self.conn.send((self.request_id, status, payload))
+        except (OSError, EOFError) as e:
+            logger.warning(f"Could not reply to inference client: {str(e)}")
+
+
+class ModelBatcher:
+    """Runs one model on a single thread, batching requests from all clients.
+
+    Requests are collected until ``max_batch`` frames are waiting or the
+    oldest has waited ``max_wait`` seconds, then run as one model call at
+    the lowest confidence threshold in the batch; each caller's results
+    are filtered back to its own threshold.
+    """
+
+    def __init__(self, name: str, max_batch: int = 16, max_wait: float = 0.005):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.frames = 0
+        self.total_queue_wait = 0.0
+        self.total_inference_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f'batcher-{name}', daemon=True)
+        self._thread.start()
+
+    def submit(self, request: _InferenceRequest):
+        self._queue.put(request)
+
+    def _collect(self) -> List[_InferenceRequest]:
+        first = self._queue.get()
+        batch = [first]
+        frame_count = len(first.frames)
+        deferred = []
+        deadline = time.time() + self.max_wait
+        while frame_count < self.max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            # Only requests at the same input size can share a model call
+            if request.imgsz != first.imgsz:
+                deferred.append(request)
+                continue
+            batch.append(request)
+            frame_count += len(request.frames)
+
+        for request in deferred:
+            self._queue.put(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            frames = [frame for request in batch for frame in request.frames]
+            start = time.time()
+            try:
+                model = get_model(self.name)
+                results = run_inference(model, frames, min(r.conf for r in batch), batch[0].imgsz)
+            except Exception as e:
+                logger.error(f"Error running {self.name} batch of {len(frames)} frames: {str(e)}")
+                for request in batch:
+                    request.reply('error', str(e))
+                continue
+
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.frames += len(frames)
+                self.total_queue_wait += sum(start - r.received_at for r in batch)
+                self.total_inference_time += time.time() - start
+
+            offset = 0
+            for request in batch:
+                detections = results[offset:offset + len(request.frames)]
+                offset += len(request.frames)
+                request.reply('ok', [d[d['confidence'] >= request.conf] for d in detections])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'frames': self.frames,
+                'avg_batch_frames': round(self.frames / self.batches, 2) if self.batches else 0.0,
+                'avg_queue_wait_ms': round(self.total_queue_wait / self.requests * 1000, 2) if self.requests else 0.0,
+                'avg_inference_ms': (
+                    round(self.total_inference_time / self.batches * 1000, 2) if self.batches else 0.0
+                ),
+                'queued': self._queue.qsize()
+            }
+
+
+class InferenceServer:
+    """Owns the models and serves detections to every web worker over a Unix socket.
+
+    Models are the ones registered with register_model() in this process
+    and load on first use. Clients send pickled frames with
+    multiprocessing.connection, so no extra dependencies are needed.
+    """
+
+    def __init__(self, address: str, authkey: bytes, max_batch: int = 16, max_wait: float = 0.005):
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._batchers: Dict[str, ModelBatcher] = {}
+        self._batchers_lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+
+    def _batcher(self, name: str) -> ModelBatcher:
+        with self._batchers_lock:
+            batcher = self._batchers.get(name)
+            if batcher is None:
+                batcher = ModelBatcher(name, self.max_batch, self.max_wait)
+                self._batchers[name] = batcher
+            return batcher
+
+    def stats(self) -> Dict[str, Any]:
+        with self._batchers_lock:
+            batchers = dict(self._batchers)
+        return {name: batcher.stats() for name, batcher in batchers.items()}
+
+    def serve_forever(self):
+        # A socket file left by a previous run would make bind fail
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        os.makedirs(os.path.dirname(self.address) or '.', exist_ok=True)
+
+        # Only this user may connect; the socket is never world-accessible, even briefly
+        old_umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.address, 0o600)
+        logger.info(f"Inference server listening on {self.address}")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except Exception as e:
+                    # Failed handshakes must not stop the server
+                    logger.warning(f"Rejected inference client: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            self._listener.close()
+
+    def _handle_client(self, conn: Connection):
+        send_lock = threading.Lock()
+        try:
+            while True:
+                message = conn.recv()
+                kind, request_id = message[0], message[1]
+                if kind == 'detect':
+                    _, _, name, frames, conf, imgsz = message
+                    self._batcher(name).submit(_InferenceRequest(request_id, frames, conf, imgsz, conn, send_lock))
+                elif kind == 'info':
+                    try:
+                        names = get_model(message[2]).names
+                        reply = (request_id, 'ok', dict(names) if isinstance(names, dict) else list(names))
+                    except Exception as e:
+                        reply = (request_id, 'error', str(e))
+                    with send_lock:
+                        conn.send(reply)
+                elif kind == 'stats':
+                    with send_lock:
+                        conn.send((request_id, 'ok', self.stats()))
+                else:
+                    with send_lock:
+                        conn.send((request_id, 'error', f"Unknown request: {kind}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+
+class RemoteModel:
+    """Thin client for a model hosted by an InferenceServer.
+
+    Stands in for a YOLO model wherever detection_utils takes one: it has
+    ``names`` and ``detect()``, and run_inference() sends frames to the
+    server instead of running them here. Each thread keeps its own
+    connection; with several server addresses, connections are spread
+    across them round-robin.
+    """
+
+    remote = True
+
+    def __init__(self, addresses: List[str], name: str, authkey: bytes, timeout: float = 60.0):
+        self.addresses = addresses
+        self.name = name
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+        self._next_address = itertools.cycle(addresses)
+        self._ids = itertools.count()
+        self._names = None
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(next(self._next_address), family='AF_UNIX', authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, kind: str, *args) -> Any:
+        request_id = next(self._ids)
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((kind, request_id, self.name) + args)
+                if not conn.poll(self.timeout):
+                    raise TimeoutError(f"Inference server did not answer within {self.timeout}s")
+                reply_id, status, payload = conn.recv()
+                break
+            except (EOFError, ConnectionError, BrokenPipeError) as e:
+                # The server restarted; reconnect once
+                self._drop_connection()
+                if attempt:
+                    raise RuntimeError(f"Inference server unavailable: {str(e)}")
+            except Exception:
+                self._drop_connection()
+                raise
+
+        if reply_id != request_id:
+            self._drop_connection()
+            raise RuntimeError("Inference server reply out of order")
+        if status != 'ok':
+            raise RuntimeError(f"Inference server error: {payload}")
+        return payload
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = self._call('info')
+        return self._names
+
+    def detect(self, frames: List[np.ndarray], conf: float, imgsz: Optional[int] = None) -> List[np.ndarray]:
+        """DETECTION_DTYPE arrays for each frame, computed by the server"""
+        return self._call('detect', list(frames), conf, imgsz)
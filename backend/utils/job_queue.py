@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes and cancellation checks against the job store
+STORE_SYNC_INTERVAL = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when the job has been cancelled"""
+
+
+class JobStore:
+    """SQLite record of job status, shared by every worker process on the node.
+
+    The worker that runs a job writes its status here, so any worker can
+    answer status requests, and other workers request cancellation by
+    setting a flag the owner picks up. Like the enrichment store, every call
+    opens a short-lived connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, '
+                'cancel_requested INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (status, updated_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def save(self, job: 'VideoJob'):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET status = excluded.status, data = excluded.data, '
+                    'updated_at = excluded.updated_at',
+                    (job.id, job.status, json.dumps(job.to_dict()), time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error saving job {job.id}: {str(e)}")
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT data FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading job {job_id}: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def request_cancel(self, job_id: str):
+        try:
+            with self._connect() as conn:
+                conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Error cancelling job {job_id}: {str(e)}")
+
+    def cancel_requested(self, job_id: str) -> bool:
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading job {job_id}: {str(e)}")
+            return False
+        return bool(row and row[0])
+
+    def prune(self, max_retained: int):
+        """Forget the oldest finished jobs once more than max_retained are kept"""
+        finished = tuple(VideoJob.FINISHED_STATES)
+        placeholders = ', '.join('?' * len(finished))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f'DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status IN ({placeholders}) '
+                    f'ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                    (*finished, max_retained)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning jobs: {str(e)}")
+
+
+class VideoJob:
+    """State of a single background processing job"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED_STATES = {COMPLETED, FAILED, CANCELLED}
+
+    def __init__(self, filename: str, store: Optional[JobStore] = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = self.QUEUED
+        self.total_frames = 0
+        self.processed_frames = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._store = store
+        self._synced_at = 0.0
+        self._cancel_checked_at = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'VideoJob':
+        """Snapshot of a job run by another worker, as recorded in the job store"""
+        job = cls(data['filename'])
+        job.id = data['job_id']
+        job.status = data['status']
+        job.total_frames = data['total_frames']
+        job.processed_frames = data['processed_frames']
+        job.result = data.get('result')
+        job.error = data.get('error')
+        job.created_at = data['created_at']
+        job.started_at = data['started_at']
+        job.finished_at = data['finished_at']
+        return job
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATES
+
+    def cancel(self):
+        """Ask the job to stop at the next checkpoint"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        if not self._cancel_event.is_set() and self._store is not None:
+            # Cancellation may have been requested through another worker
+            now = time.time()
+            if now - self._cancel_checked_at >= STORE_SYNC_INTERVAL:
+                self._cancel_checked_at = now
+                if self._store.cancel_requested(self.id):
+                    self._cancel_event.set()
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been cancelled"""
+        if self.is_cancelled():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def update_progress(self, processed_frames: int, total_frames: Optional[int] = None):
+        """Record how many frames have been processed so far"""
+        self.processed_frames = processed_frames
+        if total_frames is not None:
+            self.total_frames = total_frames
+        self.sync(force=total_frames is not None)
+
+    def sync(self, force: bool = True):
+        """Write the job's status to the store; progress updates are throttled"""
+        if self._store is None:
+            return
+        now = time.time()
+        if force or now - self._synced_at >= STORE_SYNC_INTERVAL:
+            self._synced_at = now
+            self._store.save(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job status for the API"""
+        progress = 0.0
+        if self.status == self.COMPLETED:
+            progress = 100.0
+        elif self.total_frames > 0:
+            progress = min(100.0, self.processed_frames / self.total_frames * 100)
+
+        data = {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': round(progress, 1),
+            'processed_frames': self.processed_frames,
+            'total_frames': self.total_frames,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.result is not None:
+            data['result'] = self.result
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Local worker pool that runs jobs in the background and tracks their state.
+
+    Jobs run in the process that accepted them. With a ``store``, their
+    status is also recorded there, so ``get`` and ``cancel`` work from any
+    worker process.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, max_retained: int = 100,
+                 store: Optional[JobStore] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='video-job')
+        self._jobs: 'OrderedDict[str, VideoJob]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pending_count(self) -> int:
+        """Number of jobs that are queued or running"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.is_finished)
+
+    def submit(self, filename: str, func: Callable[..., Dict[str, Any]], *args,
+               on_finish: Optional[Callable[[VideoJob], None]] = None) -> Optional[VideoJob]:
+        """Queue ``func(job, *args)`` and return its job, or None if the queue is full.
+
+        ``on_finish`` is called with the job once it has stopped for any reason,
+        which is where callers release staged files.
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.is_finished)
+            if pending >= self.max_pending:
+                return None
+
+            job = VideoJob(filename, store=self.store)
+            self._jobs[job.id] = job
+            self._prune_locked()
+
+        job.sync()
+        self._executor.submit(self._run, job, func, args, on_finish)
+        logger.info(f"Queued job {job.id} for {filename}")
+        return job
+
+    def add_completed(self, filename: str, result: Dict[str, Any]) -> VideoJob:
+        """Record a job whose result is already known (e.g. from the result cache).
+
+        Clients poll it like any other job; it never occupies a worker.
+        """
+        job = VideoJob(filename, store=self.store)
+        job.status = VideoJob.COMPLETED
+        job.result = result
+        job.started_at = job.finished_at = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_locked()
+        job.sync()
+        logger.info(f"Recorded completed job {job.id} for {filename}")
+        return job
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        """A job of this process, or a snapshot of one run by another worker"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            data = self.store.load(job_id)
+            if data is not None:
+                job = VideoJob.from_dict(data)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[VideoJob]:
+        """Cancel a job; queued jobs never start, running jobs stop at the next checkpoint"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if not job.is_finished:
+            job.cancel()
+            if self.store is not None:
+                self.store.request_cancel(job_id)
+            logger.info(f"Cancellation requested for job {job_id}")
+        return job
+
+    def _run(self, job: VideoJob, func, args, on_finish):
+        try:
+            if job.is_cancelled():
+                job.status = VideoJob.CANCELLED
+                return
+
+            job.status = VideoJob.RUNNING
+            job.started_at = time.time()
+            job.sync()
+            logger.info(f"Started job {job.id}")
+
+            job.result = func(job, *args)
+            job.status = VideoJob.COMPLETED
+            logger.info(f"Completed job {job.id}")
+
+        except JobCancelled:
+            job.status = VideoJob.CANCELLED
+            logger.info(f"Cancelled job {job.id}")
+
+        except Exception as e:
+            job.status = VideoJob.FAILED
+            job.error = str(e)
+            logger.error(f"Job {job.id} failed: {str(e)}")
+
+        finally:
+            job.finished_at = time.time()
+            job.sync()
+            if on_finish:
+                try:
+                    on_finish(job)
+                except Exception as e:
+                    logger.error(f"Error finishing job {job.id}: {str(e)}")
+
+    def _prune_locked(self):
+        """Forget the oldest finished jobs once more than max_retained are kept"""
+        excess = len(self._jobs) - self.max_retained
+        if excess <= 0:
+            return
+        if self.store is not None:
+            self.store.prune(self.max_retained)
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.is_finished][:excess]:
+            del self._jobs[job_id]
@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Optional
+
+from flask import Response, request, send_file
+
+from config import Config
+from utils.storage import get_storage_janitor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Request headers media clients send and response headers they need to read
+MEDIA_ALLOW_HEADERS = 'Content-Type, Range, If-Range, If-None-Match, If-Modified-Since'
+MEDIA_EXPOSE_HEADERS = 'Accept-Ranges, Content-Range, Content-Length, Content-Type, ETag, Last-Modified'
+
+
+def _offload_response(path: str, mimetype: str, internal_prefix: Optional[str]) -> Optional[Response]:
+    """Empty response that tells the fronting web server to send the file itself"""
+    if Config.MEDIA_OFFLOAD == 'nginx' and internal_prefix:
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{internal_prefix.rstrip('/')}/{os.path.basename(path)}"
+    elif Config.MEDIA_OFFLOAD == 'sendfile':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    else:
+        return None
+    # Range, ETag and 304 handling is left to the web server
+    response.headers['Cache-Control'] = f"public, max-age={Config.MEDIA_CACHE_MAX_AGE}"
+    return response
+
+
+def send_media(path: str, mimetype: str, internal_prefix: Optional[str] = None) -> Response:
+    """Send a processed image or video with range and conditional request support.
+
+    Byte ranges get 206 responses, so a <video> element can seek without
+    downloading the whole file, and ETag/Last-Modified validators get 304s.
+    With MEDIA_OFFLOAD set, the transfer is handed to nginx
+    (X-Accel-Redirect to ``internal_prefix``) or to a server supporting
+    X-Sendfile. The caller checks that ``path`` exists.
+    """
+    # A fresh download counts as a use for the janitor's LRU; follow-up ranges don't
+    if request.range is None or request.range.ranges[0][0] == 0:
+        get_storage_janitor().index.touch([path])
+
+    response = _offload_response(path, mimetype, internal_prefix)
+    if response is not None:
+        return response
+
+    return send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=True,
+        max_age=Config.MEDIA_CACHE_MAX_AGE
+    )
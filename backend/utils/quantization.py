@@ -0,0 +1,104 @@
+import glob
+import logging
+import os
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from utils.detection_utils import export_model, exported_model_path, letterbox
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png')
+
+
+def list_images(folder: str, limit: Optional[int] = None) -> List[str]:
+    """Image files in a folder, sorted so runs are reproducible"""
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(folder, pattern)))
+    paths = sorted(paths)
+    return paths[:limit] if limit else paths
+
+
+def to_model_input(image: np.ndarray, size: int = 640) -> np.ndarray:
+    """BGR image -> 1x3xHxW float32 RGB tensor in [0, 1], as the YOLO ONNX graph expects"""
+    image = letterbox(image, size)[0]
+    tensor = image[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(tensor, dtype=np.float32)[None] / 255.0
+
+
+def _calibration_reader(input_name: str, paths: List[str], size: int):
+    """CalibrationDataReader that feeds letterboxed images one at a time"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class ImageCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(paths)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: to_model_input(image, size)}
+            return None
+
+    return ImageCalibrationReader()
+
+
+def _copy_metadata(source_path: str, target_path: str):
+    """Keep the class names and stride YOLO reads from the ONNX metadata"""
+    import onnx
+
+    source = onnx.load(source_path)
+    target = onnx.load(target_path)
+    existing = {prop.key for prop in target.metadata_props}
+    for prop in source.metadata_props:
+        if prop.key not in existing:
+            target.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(target, target_path)
+
+
+def quantize_model(model_path: str, mode: str = 'static', calibration_dir: Optional[str] = None,
+                   num_images: int = 200, imgsz: int = 640) -> str:
+    """Produce the INT8 ONNX artifact for a .pt model and return its path.
+
+    ``dynamic`` quantizes weights only and needs no data. ``static``
+    quantizes weights and activations (QDQ format), calibrated on up to
+    ``num_images`` images from ``calibration_dir``; it is usually the
+    faster and more accurate choice for convolutional detectors.
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    import onnxruntime
+
+    fp32_path = export_model(model_path, 'onnx', imgsz=imgsz)
+    int8_path = exported_model_path(model_path, 'onnx_int8')
+
+    if mode == 'dynamic':
+        logger.info(f"Dynamic INT8 quantization of {fp32_path}")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    elif mode == 'static':
+        paths = list_images(calibration_dir or '', num_images)
+        if not paths:
+            raise ValueError(f"No calibration images found in {calibration_dir}")
+        input_name = onnxruntime.InferenceSession(
+            fp32_path, providers=['CPUExecutionProvider']
+        ).get_inputs()[0].name
+
+        logger.info(f"Static INT8 quantization of {fp32_path} with {len(paths)} calibration images")
+        quantize_static(
+            fp32_path, int8_path, _calibration_reader(input_name, paths, imgsz),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    _copy_metadata(fp32_path, int8_path)
+    logger.info(f"Quantized model written to {int8_path}")
+    return int8_path
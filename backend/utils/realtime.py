@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask_socketio import SocketIO
+
+from config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared Socket.IO server, bound to the app in create_app()
+socketio = SocketIO()
+
+
+def job_room(job_id: str) -> str:
+    """Name of the Socket.IO room that receives events for a job"""
+    return f"job:{job_id}"
+
+
+def emit_to_room(event: str, data: Dict[str, Any], room: str):
+    """Emit an event from any thread without letting errors reach the caller"""
+    try:
+        socketio.emit(event, data, to=room)
+    except Exception as e:
+        logger.warning(f"Error emitting {event} to {room}: {str(e)}")
+
+
+class ProgressReporter:
+    """Streams progress and detections of one job to its Socket.IO room.
+
+    Events are throttled to at most one every ``interval`` seconds;
+    detections found in between are buffered and sent with the next
+    progress event, so emitting never becomes a per-frame cost.
+    """
+
+    def __init__(self, job_id: str, total_frames: int, interval: Optional[float] = None,
+                 max_buffered_detections: int = 200):
+        self.job_id = job_id
+        self.room = job_room(job_id)
+        self.total_frames = total_frames
+        self.interval = Config.PROGRESS_EMIT_INTERVAL if interval is None else interval
+        self.max_buffered_detections = max_buffered_detections
+
+        self._start_time = time.time()
+        self._last_emit = 0.0
+        self._frames_done = 0
+        self._pending_detections: List[Dict[str, Any]] = []
+        self._dropped_detections = 0
+        self._lock = threading.Lock()
+
+    def detections(self, frame_index: int, detections: List[Dict[str, Any]]):
+        """Queue a frame's detections for the next event"""
+        if not detections:
+            return
+        with self._lock:
+            for detection in detections:
+                if len(self._pending_detections) >= self.max_buffered_detections:
+                    self._dropped_detections += 1
+                    continue
+                self._pending_detections.append({
+                    'frame': frame_index,
+                    'class': detection['class'],
+                    'confidence': detection['confidence'],
+                    'bbox': detection['bbox'],
+                    'track_id': detection.get('track_id')
+                })
+
+    def progress(self, frames_done: int, force: bool = False):
+        """Record progress and emit an event if the throttle interval has passed"""
+        now = time.time()
+        with self._lock:
+            self._frames_done = frames_done
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            payload = self._payload_locked(now)
+
+        emit_to_room('job_progress', payload, self.room)
+
+    def flush(self):
+        """Emit any progress and detections still held back by the throttle"""
+        self.progress(self._frames_done, force=True)
+
+    def _payload_locked(self, now: float) -> Dict[str, Any]:
+        elapsed = max(now - self._start_time, 1e-6)
+        fps = self._frames_done / elapsed
+        remaining = max(self.total_frames - self._frames_done, 0)
+
+        payload = {
+            'job_id': self.job_id,
+            'frames_done': self._frames_done,
+            'total_frames': self.total_frames,
+            'progress': round(self._frames_done / self.total_frames * 100, 1) if self.total_frames else 0,
+            'fps': round(fps, 2),
+            'eta_seconds': round(remaining / fps, 1) if fps > 0 else None,
+            'detections': self._pending_detections,
+            'dropped_detections': self._dropped_detections
+        }
+        self._pending_detections = []
+        self._dropped_detections = 0
+        return payload
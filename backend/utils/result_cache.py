@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from config import Config
+from utils.detection_utils import MODEL_VARIANTS
+from utils.storage import ArtifactIndex, StoragePolicy, get_storage_janitor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_bytes(data: Union[bytes, memoryview]) -> str:
+    """BLAKE2 content hash of an in-memory upload"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """BLAKE2 content hash of a file, read in chunks so large videos never sit in memory"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_version(model_name: str) -> str:
+    """Identify the model that produced a result, so retraining invalidates the cache
+
+    Config.MODEL_VERSION wins when set (e.g. for remote inference, where the
+    web worker may not have the weights); otherwise the weights file's size
+    and modification time stand in for a version.
+    """
+    if Config.MODEL_VERSION:
+        return f"{model_name}:{Config.MODEL_VERSION}"
+    backend = 'onnx_int8' if model_name == MODEL_VARIANTS['int8'] else Config.INFERENCE_BACKEND
+    try:
+        stat = os.stat(Config.WEAPON_MODEL_PATH)
+        return f"{model_name}:{backend}:{int(stat.st_mtime)}:{stat.st_size}"
+    except OSError:
+        return f"{model_name}:{backend}:unknown"
+
+
+def result_cache_key(content_hash: str, model_name: str, params: Dict[str, Any]) -> str:
+    """Cache key for a result: content hash + model version + detection parameters"""
+    material = json.dumps({
+        'content': content_hash,
+        'model': model_version(model_name),
+        'params': params
+    }, sort_keys=True, default=str)
+    return hashlib.blake2b(material.encode(), digest_size=20).hexdigest()
+
+
+class ResultCache:
+    """Detection results that point at processed files, keyed by result_cache_key().
+
+    Each result is a JSON entry under ``<folder>/.results`` naming the
+    processed files it refers to, which live in ``folder`` itself. The
+    entry and its files are registered in the artifact index under the
+    result's key and touched together on every hit, so the storage janitor
+    evicts them together, least recently used first; evicting any of them
+    invalidates the entry. Entries are shared by all worker processes.
+    """
+
+    def __init__(self, folder: str, kind: str, index: ArtifactIndex, max_bytes: int = 0,
+                 on_full: Optional[Callable[[], None]] = None):
+        self.folder = folder
+        self.kind = kind
+        self.index = index
+        self.max_bytes = max_bytes
+        self.on_full = on_full
+        self.index_dir = os.path.join(folder, '.results')
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result, or None if it is missing or its files are gone"""
+        path = self._entry_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(False)
+            return None
+
+        paths = [os.path.join(self.folder, name) for name in entry.get('files', [])]
+        if not all(os.path.exists(file_path) for file_path in paths):
+            self.invalidate(key)
+            self._count(False)
+            return None
+
+        self.index.touch([path] + paths)
+        self._count(True)
+        return entry['result']
+
+    def put(self, key: str, result: Dict[str, Any], files: List[str]):
+        """Store a result and the processed files (names within the folder) it refers to"""
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'result': result, 'files': files}, f, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing result cache entry: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        for file_path in [os.path.join(self.folder, name) for name in files] + [path]:
+            self.index.add(file_path, self.kind, cache_key=key)
+
+        # Evict in the background rather than on the request
+        if self.on_full and self.max_bytes and self.index.total_bytes(self.kind) > self.max_bytes:
+            self.on_full()
+
+    def invalidate(self, key: str):
+        """Forget a result; its remaining files are left for the janitor to evict"""
+        path = self._entry_path(key)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.error(f"Error removing result cache entry {path}: {str(e)}")
+        self.index.forget([path])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _get_cache(kind: str, folder: str, max_bytes: int) -> ResultCache:
+    cache = _caches.get(kind)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(kind)
+            if cache is None:
+                janitor = get_storage_janitor()
+                cache = ResultCache(folder, kind, janitor.index, max_bytes, on_full=janitor.wake)
+                janitor.register(StoragePolicy(
+                    kind, folder, max_bytes=max_bytes, max_age=Config.PROCESSED_MAX_AGE, on_evict=cache.invalidate
+                ))
+                _caches[kind] = cache
+    return cache
+
+
+def get_image_result_cache() -> ResultCache:
+    """Process-wide cache of processed images"""
+    return _get_cache('processed_image', Config.PROCESSED_IMAGES_DIR, Config.IMAGE_RESULT_CACHE_MAX_BYTES)
+
+
+def get_video_result_cache() -> ResultCache:
+    """Process-wide cache of processed videos"""
+    return _get_cache('processed_video', Config.PROCESSED_VIDEOS_FOLDER, Config.VIDEO_RESULT_CACHE_MAX_BYTES)
@@ -0,0 +1,201 @@
+import logging
+import math
+from typing import Any, Dict, List, Mapping, Optional
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SamplingPolicy:
+    """Decides which video frames are sent to a model.
+
+    Modes:
+    - ``all``: every frame
+    - ``stride``: every k-th frame
+    - ``time``: a fixed number of inferences per second of video
+    - ``adaptive``: the stride widens while nothing is found and snaps back
+      to ``min_stride`` after a detection or a scene change
+    """
+
+    MODES = ('all', 'stride', 'time', 'adaptive')
+
+    # Request parameters understood by from_params()
+    PARAMS = ('sampling', 'stride', 'rate', 'min_stride', 'max_stride')
+
+    def __init__(
+        self,
+        mode: str = 'all',
+        stride: int = 1,
+        inferences_per_second: float = 1.0,
+        fps: float = 30.0,
+        min_stride: int = 1,
+        max_stride: int = 15,
+        hold_frames: int = 30
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}. Allowed modes: {', '.join(self.MODES)}")
+        if stride < 1 or min_stride < 1 or max_stride < min_stride:
+            raise ValueError("Sampling strides must be positive and max_stride >= min_stride")
+        if not math.isfinite(inferences_per_second) or inferences_per_second <= 0:
+            raise ValueError("inferences_per_second must be a positive number")
+
+        self.mode = mode
+        self.stride = stride
+        self.inferences_per_second = inferences_per_second
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.hold_frames = hold_frames
+
+        # Adaptive state
+        self._current_stride = min_stride
+        self._hold_until = -1
+        self._next_frame = 0.0
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, Any], fps: float) -> 'SamplingPolicy':
+        """Build a policy from request parameters such as ``sampling=stride&stride=5``"""
+        mode = params.get('sampling', 'all') or 'all'
+        try:
+            return cls(
+                mode=mode,
+                stride=int(params.get('stride', 1)),
+                inferences_per_second=float(params.get('rate', 1.0)),
+                fps=fps,
+                min_stride=int(params.get('min_stride', 1)),
+                max_stride=int(params.get('max_stride', 15))
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid sampling parameters: {str(e)}")
+
+    def should_sample(self, frame_index: int) -> bool:
+        """Return True if this frame should be run through the model"""
+        if self.mode == 'all':
+            return True
+        if self.mode == 'stride':
+            return frame_index % self.stride == 0
+
+        # Time-based and adaptive modes sample against a moving target frame
+        if frame_index + 1e-6 < self._next_frame:
+            return False
+        if self.mode == 'time':
+            interval = self.fps / self.inferences_per_second
+        else:
+            interval = self._current_stride
+        self._next_frame = max(self._next_frame + interval, frame_index + 1)
+        return True
+
+    def observe(self, frame_index: int, detections: List[Any], scene_changed: bool = False):
+        """Feed back the results of a sampled frame (used by the adaptive mode)"""
+        if self.mode != 'adaptive':
+            return
+
+        if detections or scene_changed:
+            # Sample densely for a while after something happens
+            self._current_stride = self.min_stride
+            self._hold_until = frame_index + self.hold_frames
+            self._next_frame = min(self._next_frame, frame_index + self.min_stride)
+        elif frame_index > self._hold_until:
+            # Nothing happening: back off gradually
+            self._current_stride = min(self.max_stride, self._current_stride * 2)
+
+    def needs_feedback(self) -> bool:
+        """True while the next decision depends on the last sampled frame's result.
+
+        That is the adaptive mode between detections, where one detection
+        narrows the stride; callers should run a sampled frame through the
+        model and observe() it before deciding on the frames after it.
+        """
+        return self.mode == 'adaptive' and self._current_stride > self.min_stride
+
+    def describe(self) -> Dict[str, Any]:
+        """Summarize the policy for API responses"""
+        data = {'mode': self.mode}
+        if self.mode == 'stride':
+            data['stride'] = self.stride
+        elif self.mode == 'time':
+            data['inferences_per_second'] = self.inferences_per_second
+        elif self.mode == 'adaptive':
+            data['min_stride'] = self.min_stride
+            data['max_stride'] = self.max_stride
+        return data
+
+
+class SceneChangeGate:
+    """Cheap check that skips inference on frames that look like the last inferred one.
+
+    Frames are reduced to small grayscale thumbnails and compared either by
+    mean absolute pixel difference (``diff``) or by grayscale histogram
+    distance (``histogram``). The reference thumbnail only moves when a frame
+    passes the gate, so slow drift still adds up to a change eventually.
+    """
+
+    METHODS = ('diff', 'histogram')
+
+    def __init__(
+        self,
+        threshold: float = 0.02,
+        method: str = 'diff',
+        thumbnail_size: tuple = (64, 36),
+        max_skip_frames: int = 150
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown scene change method: {method}. Allowed methods: {', '.join(self.METHODS)}")
+
+        self.threshold = threshold
+        self.method = method
+        self.thumbnail_size = thumbnail_size
+        self.max_skip_frames = max_skip_frames
+
+        self.checked_frames = 0
+        self.skipped_inferences = 0
+        self._reference: Optional[np.ndarray] = None
+        self._reference_frame = -1
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        """Downscaled grayscale representation of a frame"""
+        thumbnail = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        if self.method == 'histogram':
+            hist = cv2.calcHist([thumbnail], [0], None, [32], [0, 256])
+            return cv2.normalize(hist, hist).astype(np.float32)
+        return thumbnail.astype(np.float32)
+
+    def score(self, signature: np.ndarray) -> float:
+        """Distance between a signature and the reference, from 0 (same) to 1"""
+        if self._reference is None:
+            return 1.0
+        if self.method == 'histogram':
+            return float(cv2.compareHist(self._reference, signature, cv2.HISTCMP_BHATTACHARYYA))
+        return float(np.mean(np.abs(signature - self._reference)) / 255.0)
+
+    def check(self, frame_index: int, frame: np.ndarray) -> bool:
+        """Return True if the frame changed enough to need inference"""
+        self.checked_frames += 1
+        signature = self._signature(frame)
+
+        changed = (
+            self._reference is None
+            or frame_index - self._reference_frame >= self.max_skip_frames
+            or self.score(signature) >= self.threshold
+        )
+        if changed:
+            self._reference = signature
+            self._reference_frame = frame_index
+        else:
+            self.skipped_inferences += 1
+        return changed
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize gate activity for API responses"""
+        return {
+            'method': self.method,
+            'threshold': self.threshold,
+            'checked_frames': self.checked_frames,
+            'skipped_inferences': self.skipped_inferences
+        }
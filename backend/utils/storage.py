@@ -0,0 +1,350 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process sweeps
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows the janitor handles per query while enforcing a quota
+SWEEP_BATCH = 200
+# Batches per policy and sweep, so files that cannot be removed never stall the janitor
+SWEEP_MAX_BATCHES = 25
+
+
+class ArtifactIndex:
+    """SQLite index of the files the service writes, with size and last access.
+
+    Like the enrichment store, every call opens a short-lived connection, so
+    the index is shared by threads and by every worker process on the node.
+    Files are registered when they are written, which is what lets the
+    janitor enforce quotas without listing directories.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS artifacts ('
+                'path TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, last_access REAL NOT NULL, cache_key TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (kind, last_access)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def add(self, path: str, kind: str, cache_key: Optional[str] = None, last_access: Optional[float] = None):
+        """Register (or re-register) a file that has just been written"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO artifacts (path, kind, size, created_at, last_access, cache_key) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (path, kind, size, now, last_access or now, cache_key)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error indexing {path}: {str(e)}")
+
+    def touch(self, paths: List[str]):
+        """Record an access, moving the files to the back of the eviction order"""
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    'UPDATE artifacts SET last_access = ? WHERE path = ?',
+                    [(time.time(), path) for path in paths]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating artifact access: {str(e)}")
+
+    def forget(self, paths: List[str]):
+        try:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM artifacts WHERE path = ?', [(path,) for path in paths])
+        except sqlite3.Error as e:
+            logger.error(f"Error removing artifacts from index: {str(e)}")
+
+    def contains(self, path: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM artifacts WHERE path = ?', (path,)).fetchone() is not None
+
+    def total_bytes(self, kind: str) -> int:
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE kind = ?', (kind,)).fetchone()
+            return row[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading artifact index: {str(e)}")
+            return 0
+
+    def least_recent(self, kind: str, limit: int,
+                     accessed_before: Optional[float] = None) -> List[Tuple[str, int, Optional[str]]]:
+        """(path, size, cache_key) of the least recently accessed files of a kind"""
+        query = 'SELECT path, size, cache_key FROM artifacts WHERE kind = ?'
+        params: list = [kind]
+        if accessed_before is not None:
+            query += ' AND last_access < ?'
+            params.append(accessed_before)
+        query += ' ORDER BY last_access LIMIT ?'
+        params.append(limit)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Files and bytes per kind"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute('SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind').fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading artifact index: {str(e)}")
+            return {}
+        return {kind: {'files': files, 'bytes': size} for kind, files, size in rows}
+
+
+class StoragePolicy:
+    """Quota for one kind of artifact: at most ``max_bytes`` (0 = unlimited),
+    nothing unused for longer than ``max_age`` seconds (0 = keep forever).
+
+    ``on_evict`` is called with the cache key of every removed file that
+    belongs to a cached result, so the result is invalidated with it.
+    """
+
+    def __init__(self, kind: str, folder: str, max_bytes: int = 0, max_age: float = 0,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.kind = kind
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.on_evict = on_evict
+        self.files_removed = 0
+        self.files_failed = 0
+        self.bytes_reclaimed = 0
+
+
+class StorageJanitor:
+    """Background thread that enforces storage policies from the artifact index.
+
+    Each sweep removes files not accessed within a policy's max age, then
+    the least recently accessed files until the kind is within its byte
+    quota. Only one process per node sweeps, chosen with a lock file; the
+    others only register files and can wake the sweeper early through
+    ``wake()`` in their own process when a quota is exceeded.
+    """
+
+    def __init__(self, index: ArtifactIndex, interval: float = 60.0, lock_path: Optional[str] = None):
+        self.index = index
+        self.interval = interval
+        self.lock_path = lock_path or f"{index.path}.lock"
+        self._policies: Dict[str, StoragePolicy] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._adopted = set()
+
+        self.runs = 0
+        self.last_run_at: Optional[float] = None
+        self.last_run_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='storage-janitor', daemon=True)
+
+    def register(self, policy: StoragePolicy):
+        with self._lock:
+            self._policies[policy.kind] = policy
+        self.wake()
+
+    def policy(self, kind: str) -> Optional[StoragePolicy]:
+        with self._lock:
+            return self._policies.get(kind)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def wake(self):
+        """Sweep now instead of at the next interval"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Storage janitor sweep failed: {str(e)}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _is_leader(self) -> bool:
+        """Hold the node-wide sweep lock for the life of the process"""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Storage janitor sweeping in process {os.getpid()}")
+        return True
+
+    def sweep(self):
+        if not self._is_leader():
+            return
+
+        start = time.time()
+        with self._lock:
+            policies = list(self._policies.values())
+        for policy in policies:
+            if policy.kind not in self._adopted:
+                self._adopt(policy)
+                self._adopted.add(policy.kind)
+            if policy.max_age > 0:
+                self._expire(policy, start - policy.max_age)
+            if policy.max_bytes > 0:
+                self._enforce_quota(policy, start)
+
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = start
+            self.last_run_seconds = time.time() - start
+
+    def _adopt(self, policy: StoragePolicy):
+        """Index files written before the index existed or left by a crash.
+
+        This is the only directory listing, done once per policy when the
+        sweeping process starts; files are dated by their modification time.
+        """
+        adopted = 0
+        try:
+            with os.scandir(policy.folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and not self.index.contains(entry.path):
+                        self.index.add(entry.path, policy.kind, last_access=entry.stat().st_mtime)
+                        adopted += 1
+        except OSError as e:
+            logger.error(f"Error indexing {policy.folder}: {str(e)}")
+        if adopted:
+            logger.info(f"Indexed {adopted} untracked files in {policy.folder}")
+
+    def _expire(self, policy: StoragePolicy, accessed_before: float):
+        for _ in range(SWEEP_MAX_BATCHES):
+            rows = self.index.least_recent(policy.kind, SWEEP_BATCH, accessed_before=accessed_before)
+            for row in rows:
+                self._remove(policy, *row)
+            if len(rows) < SWEEP_BATCH:
+                return
+
+    def _enforce_quota(self, policy: StoragePolicy, sweep_started: float):
+        excess = self.index.total_bytes(policy.kind) - policy.max_bytes
+        for _ in range(SWEEP_MAX_BATCHES):
+            if excess <= 0:
+                return
+            # Files that failed to delete were touched during this sweep and wait for the next one
+            rows = self.index.least_recent(policy.kind, SWEEP_BATCH, accessed_before=sweep_started)
+            if not rows:
+                return
+            for path, size, cache_key in rows:
+                if self._remove(policy, path, size, cache_key):
+                    excess -= size
+                    if excess <= 0:
+                        return
+
+    def _remove(self, policy: StoragePolicy, path: str, size: int, cache_key: Optional[str]) -> bool:
+        """Delete an indexed file; False if it could not be deleted"""
+        reclaimed = 0
+        try:
+            os.remove(path)
+            reclaimed = size
+        except FileNotFoundError:
+            # Already removed by the code that wrote it
+            pass
+        except OSError as e:
+            logger.error(f"Error removing {path}: {str(e)}")
+            # Move it to the back of the eviction order so the next rows get their turn
+            self.index.touch([path])
+            with self._lock:
+                policy.files_failed += 1
+            return False
+        self.index.forget([path])
+
+        # Per-job subfolders (e.g. HLS segments) go once their last file does
+        parent = os.path.dirname(path)
+        if os.path.abspath(parent) != os.path.abspath(policy.folder):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                pass
+
+        with self._lock:
+            policy.files_removed += 1 if reclaimed else 0
+            policy.bytes_reclaimed += reclaimed
+
+        if cache_key and policy.on_evict:
+            try:
+                policy.on_evict(cache_key)
+            except Exception as e:
+                logger.error(f"Error invalidating cached result {cache_key}: {str(e)}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        usage = self.index.summary()
+        with self._lock:
+            return {
+                'sweeping': self._lock_file is not None or fcntl is None,
+                'interval': self.interval,
+                'runs': self.runs,
+                'last_run_at': self.last_run_at,
+                'last_run_ms': round(self.last_run_seconds * 1000, 2),
+                'files_removed': sum(p.files_removed for p in self._policies.values()),
+                'files_failed': sum(p.files_failed for p in self._policies.values()),
+                'bytes_reclaimed': sum(p.bytes_reclaimed for p in self._policies.values()),
+                'kinds': {
+                    kind: {
+                        **usage.get(kind, {'files': 0, 'bytes': 0}),
+                        'max_bytes': policy.max_bytes,
+                        'max_age': policy.max_age,
+                        'files_removed': policy.files_removed,
+                        'files_failed': policy.files_failed,
+                        'bytes_reclaimed': policy.bytes_reclaimed
+                    } for kind, policy in self._policies.items()
+                }
+            }
+
+
+_janitor: Optional[StorageJanitor] = None
+_janitor_lock = threading.Lock()
+
+
+def get_storage_janitor() -> StorageJanitor:
+    """Process-wide janitor, started on first use with the upload policy registered"""
+    global _janitor
+    if _janitor is None:
+        with _janitor_lock:
+            if _janitor is None:
+                janitor = StorageJanitor(ArtifactIndex(Config.STORAGE_INDEX_PATH), interval=Config.STORAGE_JANITOR_INTERVAL)
+                # Uploads are removed when their job finishes; this only catches leftovers
+                janitor.register(StoragePolicy('upload', Config.UPLOAD_FOLDER, max_age=Config.UPLOAD_MAX_AGE))
+                janitor.start()
+                _janitor = janitor
+    return _janitor
@@ -0,0 +1,341 @@
+import fnmatch
+import ipaddress
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+from utils.detection_utils import IoUTracker
+from utils.realtime import emit_to_room
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Network sources OpenCV can open; Config.STREAM_ALLOWED_SCHEMES narrows these down
+STREAM_SCHEMES = ('rtsp', 'rtsps', 'rtmp', 'http', 'https')
+
+
+def stream_room(stream_id: str) -> str:
+    """Name of the Socket.IO room that receives events for a stream"""
+    return f"stream:{stream_id}"
+
+
+def host_allowed(host: str, allowed_hosts: Iterable[str]) -> bool:
+    """Match a host against hostname patterns (``cam1.local``, ``*.cams.example.com``)
+    and IP networks (``10.20.0.0/16``). Hostnames are not resolved."""
+    host = host.lower()
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        address = None
+
+    for pattern in allowed_hosts:
+        if address is not None:
+            try:
+                if address in ipaddress.ip_network(pattern, strict=False):
+                    return True
+                continue
+            except ValueError:
+                pass
+        if fnmatch.fnmatchcase(host, pattern.lower()):
+            return True
+    return False
+
+
+def parse_stream_source(source: Any, allow_files: bool = False, allow_devices: bool = False,
+                        allowed_schemes: Iterable[str] = (), allowed_hosts: Iterable[str] = ()) -> Union[int, str]:
+    """Validate a stream source against the configured allowlists.
+
+    Accepts a URL whose scheme and host are both allowed, a capture device
+    index if ``allow_devices``, or a local file if ``allow_files``.
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.strip().isdigit()):
+        if not allow_devices:
+            raise ValueError('Capture devices are not enabled as stream sources')
+        return int(source)
+    if not isinstance(source, str) or not source.strip():
+        raise ValueError('Stream source is required')
+
+    source = source.strip()
+    url = urlsplit(source)
+    scheme = url.scheme.lower()
+    if scheme in STREAM_SCHEMES:
+        if scheme not in allowed_schemes:
+            raise ValueError(f"Stream scheme not allowed: {scheme}")
+        if not url.hostname or not host_allowed(url.hostname, allowed_hosts):
+            raise ValueError(f"Stream host not allowed: {url.hostname or ''}")
+        return source
+    if allow_files and os.path.isfile(source):
+        return source
+    raise ValueError('Unsupported stream source. Use an rtsp/rtmp/http(s) URL')
+
+
+class LatestFrameReader:
+    """Reads a capture in a background thread and keeps only the newest frames.
+
+    The buffer is a bounded deque, so when the consumer falls behind the
+    oldest frames are dropped and latency never accumulates. Local files
+    are paced at their native frame rate to stand in for a live camera.
+    """
+
+    def __init__(self, source: Union[int, str], buffer_size: int = 2, loop: bool = False,
+                 reconnect_delay: float = 2.0):
+        self.source = source
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.fps = 0.0
+        self.error: Optional[str] = None
+
+        self._buffer: deque = deque(maxlen=max(1, buffer_size))
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stream-reader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def read(self, timeout: float = 1.0) -> Optional[Tuple[int, np.ndarray, float]]:
+        """Return the newest buffered (frame_index, frame, capture_time), or None.
+
+        Older buffered frames are discarded and counted as dropped.
+        """
+        with self._condition:
+            if not self._buffer and not self._finished:
+                self._condition.wait(timeout)
+            if not self._buffer:
+                return None
+            frame = self._buffer.pop()
+            self.frames_dropped += len(self._buffer)
+            self._buffer.clear()
+            return frame
+
+    def _open(self) -> Optional[cv2.VideoCapture]:
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        # Keep the driver-side buffer small for live sources
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        return cap
+
+    def _run(self):
+        cap = None
+        try:
+            while not self._stop.is_set():
+                if cap is None:
+                    cap = self._open()
+                    if cap is None:
+                        if self.is_file:
+                            self.error = f"Could not open stream source: {self.source}"
+                            break
+                        logger.warning(f"Could not open stream {self.source}, retrying in {self.reconnect_delay}s")
+                        self._stop.wait(self.reconnect_delay)
+                        continue
+
+                frame_start = time.time()
+                ret, frame = cap.read()
+                if not ret:
+                    cap.release()
+                    cap = None
+                    if self.is_file and not self.loop:
+                        break
+                    continue
+
+                with self._condition:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self.frames_dropped += 1
+                    self._buffer.append((self.frames_read, frame, time.time()))
+                    self.frames_read += 1
+                    self._condition.notify()
+
+                # Replay files in real time so they behave like a camera
+                if self.is_file and self.fps > 0:
+                    delay = 1.0 / self.fps - (time.time() - frame_start)
+                    if delay > 0:
+                        self._stop.wait(delay)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Error reading stream {self.source}: {str(e)}")
+        finally:
+            if cap is not None:
+                cap.release()
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+
+class StreamSession:
+    """Continuous detection over one live source, pushing results over Socket.IO"""
+
+    def __init__(self, source: Union[int, str], detect: Callable[[np.ndarray], List[Dict[str, Any]]],
+                 on_detections: Optional[Callable[['StreamSession', int, List[Dict[str, Any]]], None]] = None,
+                 buffer_size: int = 2, loop: bool = False, stats_interval: float = 1.0):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.detect = detect
+        self.on_detections = on_detections
+        self.stats_interval = stats_interval
+        self.room = stream_room(self.id)
+
+        self.reader = LatestFrameReader(source, buffer_size=buffer_size, loop=loop)
+        self.tracker = IoUTracker()
+        self.status = 'starting'
+        self.started_at = time.time()
+        self.frames_processed = 0
+        self.tracks_closed = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self.processing_fps = 0.0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.reader.start()
+        self._thread = threading.Thread(target=self._run, name=f'stream-{self.id[:8]}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.reader.stop()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    @property
+    def is_running(self) -> bool:
+        return self.status in ('starting', 'running')
+
+    def _run(self):
+        self.status = 'running'
+        last_stats = 0.0
+        window_start = time.time()
+        window_frames = 0
+        try:
+            while not self._stop.is_set():
+                item = self.reader.read(timeout=1.0)
+                if item is None:
+                    if self.reader.finished:
+                        break
+                    continue
+
+                frame_index, frame, captured_at = item
+                detections = self.detect(frame)
+                self.tracker.update(frame_index, detections)
+                self.tracks_closed += len(self.tracker.pop_finished())
+
+                # Latency from capture to detection result
+                self.last_latency = time.time() - captured_at
+                self.avg_latency = 0.9 * self.avg_latency + 0.1 * self.last_latency if self.frames_processed else self.last_latency
+                self.frames_processed += 1
+                window_frames += 1
+
+                if detections:
+                    emit_to_room('stream_detections', {
+                        'stream_id': self.id,
+                        'frame': frame_index,
+                        'latency': round(self.last_latency, 3),
+                        'detections': detections
+                    }, self.room)
+                    if self.on_detections:
+                        self.on_detections(self, frame_index, detections)
+
+                now = time.time()
+                if now - last_stats >= self.stats_interval:
+                    self.processing_fps = window_frames / max(now - window_start, 1e-6)
+                    window_start, window_frames = now, 0
+                    last_stats = now
+                    emit_to_room('stream_stats', self.to_dict(), self.room)
+
+            self.status = 'error' if self.reader.error else 'stopped'
+        except Exception as e:
+            self.status = 'error'
+            self.reader.error = str(e)
+            logger.error(f"Error in stream {self.id}: {str(e)}")
+        finally:
+            self.reader.stop()
+            emit_to_room('stream_stats', self.to_dict(), self.room)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'stream_id': self.id,
+            'source': str(self.source),
+            'status': self.status,
+            'started_at': self.started_at,
+            'frames_read': self.reader.frames_read,
+            'frames_processed': self.frames_processed,
+            'frames_dropped': self.reader.frames_dropped,
+            'latency_seconds': round(self.last_latency, 3),
+            'avg_latency_seconds': round(self.avg_latency, 3),
+            'processing_fps': round(self.processing_fps, 2),
+            'source_fps': self.reader.fps,
+            'tracks_closed': self.tracks_closed
+        }
+        if self.reader.error:
+            data['error'] = self.reader.error
+        return data
+
+
+class StreamManager:
+    """Keeps track of live stream sessions and caps how many run per process"""
+
+    def __init__(self, max_streams: int = 4):
+        self.max_streams = max_streams
+        self._sessions: Dict[str, StreamSession] = {}
+        self._lock = threading.Lock()
+
+    def start(self, source: Union[int, str], detect, **kwargs) -> Optional[StreamSession]:
+        """Start a session, or return None if the stream limit is reached"""
+        with self._lock:
+            # Forget sessions that have ended
+            for stream_id in [sid for sid, s in self._sessions.items() if not s.is_running]:
+                del self._sessions[stream_id]
+            if len(self._sessions) >= self.max_streams:
+                return None
+
+            session = StreamSession(source, detect, **kwargs)
+            self._sessions[session.id] = session
+
+        session.start()
+        logger.info(f"Started stream {session.id} from {source}")
+        return session
+
+    def get(self, stream_id: str) -> Optional[StreamSession]:
+        with self._lock:
+            return self._sessions.get(stream_id)
+
+    def list(self) -> List[StreamSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stop(self, stream_id: str) -> Optional[StreamSession]:
+        session = self.get(stream_id)
+        if session is not None:
+            session.stop()
+            logger.info(f"Stopped stream {stream_id}")
+        return session
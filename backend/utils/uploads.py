@@ -0,0 +1,122 @@
+import io
+import logging
+import os
+import tempfile
+import uuid
+from typing import Optional, Union
+
+from flask import Request
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from config import Config
+from utils.storage import get_storage_janitor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Uploads that are decoded straight from memory
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png'}
+
+# Prefix of files that are still being streamed in from a request body
+STAGING_PREFIX = 'incoming_'
+
+
+def _extension(filename: Optional[str]) -> str:
+    if not filename or '.' not in filename:
+        return ''
+    return filename.rsplit('.', 1)[1].lower()
+
+
+class StreamingUploadRequest(Request):
+    """Request class that controls where multipart file parts are written.
+
+    Images are kept in memory so they can be decoded with cv2.imdecode
+    without touching disk: in a plain buffer when the whole request fits
+    UPLOAD_MEMORY_BUDGET, otherwise in a spooled temp file that moves to
+    disk past MAX_IMAGE_SIZE per part or the budget per request.
+    Everything else (videos) is streamed chunk by chunk into a file in
+    Config.UPLOAD_FOLDER while the body arrives, and that file is used in
+    place, so the upload is written to disk once instead of being spooled
+    to a temp file and copied again by save().
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        if _extension(filename) in IMAGE_EXTENSIONS:
+            # The parts of a request can never be larger than the request itself
+            if total_content_length is not None and total_content_length <= Config.UPLOAD_MEMORY_BUDGET:
+                return io.BytesIO()
+
+            # Reserve this part's share of the request's memory budget
+            budget = getattr(self, '_upload_memory_budget', Config.UPLOAD_MEMORY_BUDGET)
+            in_memory = min(Config.MAX_IMAGE_SIZE, budget)
+            self._upload_memory_budget = budget - in_memory
+            if in_memory <= 0:
+                return tempfile.TemporaryFile(mode='w+b', dir=Config.UPLOAD_FOLDER)
+            return tempfile.SpooledTemporaryFile(max_size=in_memory, mode='w+b', dir=Config.UPLOAD_FOLDER)
+
+        suffix = f".{_extension(filename)}" if _extension(filename) else ''
+        return tempfile.NamedTemporaryFile(
+            mode='w+b', dir=Config.UPLOAD_FOLDER, prefix=STAGING_PREFIX, suffix=suffix, delete=False
+        )
+
+
+def read_upload_bytes(file: FileStorage, max_size: int) -> Optional[Union[bytes, memoryview]]:
+    """Return the contents of an upload, or None if it exceeds max_size.
+
+    Uploads held in a plain buffer are returned as a view of it, without copying.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        data = stream.getbuffer()
+        return data if len(data) <= max_size else None
+
+    stream.seek(0)
+    data = stream.read(max_size + 1)
+    return data if len(data) <= max_size else None
+
+
+def stage_upload(file: FileStorage, folder: str = Config.UPLOAD_FOLDER) -> str:
+    """Give a streamed upload a unique name in ``folder`` and return its path.
+
+    Uploads that were streamed to disk are renamed in place; anything else
+    is written out once.
+    """
+    filename = f"{uuid.uuid4().hex[:12]}_{secure_filename(file.filename)}"
+    target_path = os.path.join(folder, filename)
+
+    staged_path = getattr(file.stream, 'name', None)
+    if isinstance(staged_path, str) and os.path.dirname(os.path.abspath(staged_path)) == os.path.abspath(folder):
+        file.stream.close()
+        os.replace(staged_path, target_path)
+    else:
+        file.save(target_path)
+
+    # Indexed so the storage janitor can remove it if its job never cleans up
+    get_storage_janitor().index.add(target_path, 'upload')
+    return target_path
+
+
+def release_upload(path: str):
+    """Remove a staged upload that has been processed"""
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception as e:
+        logger.error(f"Error removing staged upload {path}: {str(e)}")
+    get_storage_janitor().index.forget([path])
+
+
+def discard_upload(file: FileStorage):
+    """Remove the staging file of an upload that is not going to be used"""
+    staged_path = getattr(file.stream, 'name', None)
+    if not isinstance(staged_path, str):
+        return
+    try:
+        file.stream.close()
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+    except Exception as e:
+        logger.error(f"Error removing staged upload {staged_path}: {str(e)}")
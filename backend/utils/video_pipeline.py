@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream between pipeline stages
+_END_OF_STREAM = object()
+
+
+class VideoPipeline:
+    """Three-stage video pipeline: decoder thread -> inference -> encoder thread.
+
+    Stages are connected by bounded queues, so a slow stage blocks the ones
+    before it instead of letting frames pile up in memory. Inference runs in
+    the calling thread and consumes frames in batches; since every stage is
+    FIFO, frames are written in the order they were decoded.
+    """
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        writer: cv2.VideoWriter,
+        process_batch: Callable[[List[np.ndarray], int], List[np.ndarray]],
+        batch_size: int = 16,
+        queue_size: int = 64,
+        check_cancelled: Optional[Callable[[], None]] = None,
+        on_progress: Optional[Callable[[int], None]] = None
+    ):
+        self.cap = cap
+        self.writer = writer
+        self.process_batch = process_batch
+        self.batch_size = max(1, batch_size)
+        self.check_cancelled = check_cancelled
+        self.on_progress = on_progress
+
+        # Decoded frames waiting for inference, and processed batches waiting to be written
+        self._decoded = queue.Queue(maxsize=max(self.batch_size, queue_size))
+        self._encoded = queue.Queue(maxsize=max(1, queue_size // self.batch_size))
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self.frames_written = 0
+
+    def run(self) -> int:
+        """Process the whole video and return the number of frames written"""
+        decoder = threading.Thread(target=self._decode, name='video-decoder', daemon=True)
+        encoder = threading.Thread(target=self._encode, name='video-encoder', daemon=True)
+        decoder.start()
+        encoder.start()
+
+        try:
+            self._infer()
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            decoder.join()
+            encoder.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.frames_written
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Put with back-pressure; gives up if the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Get the next item, or end-of-stream if the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END_OF_STREAM
+
+    def _fail(self, stage: str, error: BaseException):
+        logger.error(f"Error in video {stage} stage: {str(error)}")
+        self._errors.append(error)
+        self._stop.set()
+
+    def _decode(self):
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                if not self._put(self._decoded, frame):
+                    return
+        except Exception as e:
+            self._fail('decode', e)
+        finally:
+            self._put(self._decoded, _END_OF_STREAM)
+
+    def _infer(self):
+        first_frame_index = 0
+        finished = False
+        try:
+            while not finished and not self._stop.is_set():
+                if self.check_cancelled:
+                    self.check_cancelled()
+
+                # Collect a full batch unless the stream ends first
+                batch = []
+                while len(batch) < self.batch_size:
+                    frame = self._get(self._decoded)
+                    if frame is _END_OF_STREAM:
+                        finished = True
+                        break
+                    batch.append(frame)
+
+                if batch:
+                    processed = self.process_batch(batch, first_frame_index)
+                    first_frame_index += len(batch)
+                    if not self._put(self._encoded, processed):
+                        break
+        finally:
+            self._put(self._encoded, _END_OF_STREAM)
+
+    def _encode(self):
+        try:
+            while True:
+                frames = self._get(self._encoded)
+                if frames is _END_OF_STREAM:
+                    break
+                for frame in frames:
+                    self.writer.write(frame)
+                    self.frames_written += 1
+                if self.on_progress:
+                    self.on_progress(self.frames_written)
+        except Exception as e:
+            self._fail('encode', e)
@@ -0,0 +1,108 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def confidence_bucket(confidence: Optional[float], width: float = 0.25) -> str:
+    """Label the confidence band a value falls in, e.g. 0.8 -> '0.75-1.00'"""
+    if confidence is None:
+        return 'any'
+    buckets = max(1, int(round(1 / width)))
+    index = min(int(math.floor(max(confidence, 0.0) / width)), buckets - 1)
+    return f"{index * width:.2f}-{min((index + 1) * width, 1.0):.2f}"
+
+
+class LRUTTLCache:
+    """Thread-safe in-memory cache with LRU eviction and per-entry expiry.
+
+    An optional backing store (any object with ``get(key)`` and
+    ``set(key, value)``) is consulted on misses and written through on
+    sets, so every worker process can share one warm cache. Keys the store
+    does not have are remembered for ``miss_ttl`` seconds, so a key that is
+    still being enriched costs one store read, not one per detection.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, backing_store: Any = None,
+                 miss_ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backing_store = backing_store
+        self.miss_ttl = miss_ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._store_misses: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.backing_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            # The store was asked recently and did not have it
+            check_store = self.backing_store is not None and self._store_misses.get(key, 0) <= now
+            if not check_store:
+                self.misses += 1
+                return None
+
+        value = self.backing_store.get(key)
+        with self._lock:
+            if value is not None:
+                self._store_misses.pop(key, None)
+                self.backing_hits += 1
+                self._store_locked(key, value, now)
+                return value
+
+            self._store_misses[key] = now + self.miss_ttl
+            self._store_misses.move_to_end(key)
+            while len(self._store_misses) > self.max_entries:
+                self._store_misses.popitem(last=False)
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._store_misses.pop(key, None)
+            self._store_locked(key, value, time.time())
+        if self.backing_store is not None:
+            self.backing_store.set(key, value)
+
+    def _store_locked(self, key: str, value: Any, now: float):
+        self._entries[key] = (value, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.backing_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'backing_hits': self.backing_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.backing_hits) / lookups, 3) if lookups else 0.0
+            }
@@ -5,6 +5,7 @@ from typing import Dict, Optional
 import json
 from dotenv import load_dotenv
 import time
+import threading
 from datetime import datetime, timedelta
 
 # Load environment variables from .env file
@@ -37,31 +38,31 @@ class WeaponInfo:
     RATE_LIMIT_WINDOW = 60  # seconds
     MAX_REQUESTS_PER_WINDOW = 3
     _request_timestamps = []
+    _rate_limit_lock = threading.Lock()
     
     @staticmethod
     def _check_rate_limit():
-        """Check if we're within rate limits and wait if necessary"""
-        now = datetime.now()
-        # Remove timestamps older than the window
-        WeaponInfo._request_timestamps = [
-            ts for ts in WeaponInfo._request_timestamps
-            if now - ts < timedelta(seconds=WeaponInfo.RATE_LIMIT_WINDOW)
-        ]
-        
-        if len(WeaponInfo._request_timestamps) >= WeaponInfo.MAX_REQUESTS_PER_WINDOW:
-            # Calculate wait time
-            oldest_request = WeaponInfo._request_timestamps[0]
-            wait_time = (oldest_request + timedelta(seconds=WeaponInfo.RATE_LIMIT_WINDOW) - now).total_seconds()
-            if wait_time > 0:
-                logger.info(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-                # Clear timestamps after waiting
-                WeaponInfo._request_timestamps = []
-    
-    @staticmethod
-    def _record_request():
-        """Record a new API request timestamp"""
-        WeaponInfo._request_timestamps.append(datetime.now())
+        """Wait until a request slot is free, then reserve it for this call"""
+        while True:
+            with WeaponInfo._rate_limit_lock:
+                now = datetime.now()
+                # Remove timestamps older than the window
+                WeaponInfo._request_timestamps = [
+                    ts for ts in WeaponInfo._request_timestamps
+                    if now - ts < timedelta(seconds=WeaponInfo.RATE_LIMIT_WINDOW)
+                ]
+                
+                if len(WeaponInfo._request_timestamps) < WeaponInfo.MAX_REQUESTS_PER_WINDOW:
+                    WeaponInfo._request_timestamps.append(now)
+                    return
+                
+                # Calculate wait time
+                oldest_request = WeaponInfo._request_timestamps[0]
+                wait_time = (oldest_request + timedelta(seconds=WeaponInfo.RATE_LIMIT_WINDOW) - now).total_seconds()
+            
+            # Sleep outside the lock so other threads can still check the limit
+            logger.info(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
+            time.sleep(max(wait_time, 0.1))
     
     # Fallback weapon database for when API is not available
     FALLBACK_DATABASE = {
@@ -103,6 +104,80 @@ class WeaponInfo:
         }
     }
     
+    FALLBACK_RISK_DATABASE = {
+        'knife': {
+            'risk_level': 'high',
+            'risk_factors': [
+                'Close-range weapon',
+                'Can cause severe injuries',
+                'Difficult to detect',
+                'Easy to conceal'
+            ],
+            'recommended_actions': [
+                'Maintain safe distance',
+                'Alert authorities',
+                'Evacuate if possible'
+            ],
+            'safety_measures': [
+                'Install metal detectors',
+                'Train security personnel',
+                'Implement strict security checks'
+            ],
+            'emergency_procedures': [
+                'Call emergency services',
+                'Secure the area',
+                'Provide first aid if safe'
+            ]
+        },
+        'gun': {
+            'risk_level': 'critical',
+            'risk_factors': [
+                'Long-range weapon',
+                'Multiple casualties possible',
+                'High lethality',
+                'Rapid fire capability'
+            ],
+            'recommended_actions': [
+                'Seek immediate cover',
+                'Call emergency services',
+                'Do not approach the weapon'
+            ],
+            'safety_measures': [
+                'Install weapon detection systems',
+                'Implement strict access control',
+                'Regular security training'
+            ],
+            'emergency_procedures': [
+                'Call emergency services',
+                'Lock down the area',
+                'Follow evacuation procedures'
+            ]
+        }
+    }
+    
+    @classmethod
+    def fallback_weapon_info(cls, weapon_name, description="No information available"):
+        """Offline weapon information used when Gemini is unavailable or not yet queried"""
+        return cls.FALLBACK_DATABASE.get(weapon_name.lower(), {
+            "name": weapon_name,
+            "type": "unknown",
+            "description": description,
+            "specifications": {},
+            "risk_factor": "unknown",
+            "prevention_measures": []
+        })
+    
+    @classmethod
+    def fallback_risk_assessment(cls, weapon_name):
+        """Offline risk assessment used when Gemini is unavailable or not yet queried"""
+        return cls.FALLBACK_RISK_DATABASE.get(weapon_name.lower(), {
+            'risk_level': 'unknown',
+            'risk_factors': ['Unknown risk factors'],
+            'recommended_actions': ['Unknown recommended actions'],
+            'safety_measures': ['Unknown safety measures'],
+            'emergency_procedures': ['Unknown emergency procedures']
+        })
+    
     def __init__(self):
         self.model = model
 
@@ -120,12 +195,15 @@ class WeaponInfo:
             logger.error(f"Error parsing Gemini response: {str(e)}")
             return None
 
-    def get_weapon_info(self, weapon_name):
-        """Get detailed information about a weapon using Gemini AI"""
+    def get_weapon_info(self, weapon_name, fallback_on_error=True):
+        """Get detailed information about a weapon using Gemini AI
+        
+        With ``fallback_on_error=False`` failures are raised instead of
+        being replaced with fallback data, so callers can retry later.
+        """
         try:
             # Check rate limit before making request
             self._check_rate_limit()
-            self._record_request()
 
             prompt = f"""Analyze this weapon and provide information in the following JSON format:
             {{
@@ -154,34 +232,24 @@ class WeaponInfo:
             if weapon_data:
                 return weapon_data
             
+            if not fallback_on_error:
+                raise ValueError(f"Could not parse weapon info for: {weapon_name}")
+            
             # If parsing failed, use fallback data
             logger.warning(f"Using fallback data for weapon: {weapon_name}")
-            return self.FALLBACK_DATABASE.get(weapon_name.lower(), {
-                "name": weapon_name,
-                "type": "unknown",
-                "description": "No information available",
-                "specifications": {},
-                "risk_factor": "unknown",
-                "prevention_measures": []
-            })
+            return self.fallback_weapon_info(weapon_name)
 
         except Exception as e:
             logger.error(f"Error getting weapon info: {str(e)}")
-            return self.FALLBACK_DATABASE.get(weapon_name.lower(), {
-                "name": weapon_name,
-                "type": "unknown",
-                "description": "Error retrieving information",
-                "specifications": {},
-                "risk_factor": "unknown",
-                "prevention_measures": []
-            })
+            if not fallback_on_error:
+                raise
+            return self.fallback_weapon_info(weapon_name, "Error retrieving information")
 
-    def get_risk_assessment(self, weapon_name, confidence=None):
+    def get_risk_assessment(self, weapon_name, confidence=None, fallback_on_error=True):
         """Get risk assessment for a weapon using Gemini AI"""
         try:
             # Check rate limit before making request
             self._check_rate_limit()
-            self._record_request()
 
             confidence_str = f" with {confidence:.2f} confidence" if confidence else ""
             prompt = f"""Analyze the risk of {weapon_name}{confidence_str} and provide assessment in the following JSON format:
@@ -204,69 +272,17 @@ class WeaponInfo:
             if risk_data:
                 return risk_data
             
+            if not fallback_on_error:
+                raise ValueError(f"Could not parse risk assessment for: {weapon_name}")
+            
             # If parsing failed, use fallback data
             logger.warning(f"Using fallback risk assessment for weapon: {weapon_name}")
-            fallback_data = {
-                'knife': {
-                    'risk_level': 'high',
-                    'risk_factors': [
-                        'Close-range weapon',
-                        'Can cause severe injuries',
-                        'Difficult to detect',
-                        'Easy to conceal'
-                    ],
-                    'recommended_actions': [
-                        'Maintain safe distance',
-                        'Alert authorities',
-                        'Evacuate if possible'
-                    ],
-                    'safety_measures': [
-                        'Install metal detectors',
-                        'Train security personnel',
-                        'Implement strict security checks'
-                    ],
-                    'emergency_procedures': [
-                        'Call emergency services',
-                        'Secure the area',
-                        'Provide first aid if safe'
-                    ]
-                },
-                'gun': {
-                    'risk_level': 'critical',
-                    'risk_factors': [
-                        'Long-range weapon',
-                        'Multiple casualties possible',
-                        'High lethality',
-                        'Rapid fire capability'
-                    ],
-                    'recommended_actions': [
-                        'Seek immediate cover',
-                        'Call emergency services',
-                        'Do not approach the weapon'
-                    ],
-                    'safety_measures': [
-                        'Install weapon detection systems',
-                        'Implement strict access control',
-                        'Regular security training'
-                    ],
-                    'emergency_procedures': [
-                        'Call emergency services',
-                        'Lock down the area',
-                        'Follow evacuation procedures'
-                    ]
-                }
-            }
-            
-            return fallback_data.get(weapon_name.lower(), {
-                'risk_level': 'unknown',
-                'risk_factors': ['Unknown risk factors'],
-                'recommended_actions': ['Unknown recommended actions'],
-                'safety_measures': ['Unknown safety measures'],
-                'emergency_procedures': ['Unknown emergency procedures']
-            })
+            return self.fallback_risk_assessment(weapon_name)
 
         except Exception as e:
             logger.error(f"Error getting risk assessment: {str(e)}")
+            if not fallback_on_error:
+                raise
             return {
                 'risk_level': 'unknown',
                 'risk_factors': ['Error retrieving risk factors'],
@@ -0,0 +1,7 @@
+"""WSGI entry point for running the backend under gunicorn.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app
+
+app, socketio = create_app()
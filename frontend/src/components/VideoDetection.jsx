@@ -18,6 +18,7 @@ import { styled } from "@mui/material/styles";
 import CloudUploadIcon from "@mui/icons-material/CloudUpload";
 import VideoLibraryIcon from "@mui/icons-material/VideoLibrary";
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, LineChart, Line } from "recharts";
+import { waitForVideoJob } from "../services/api";
 
 const VisuallyHiddenInput = styled("input")`
   clip: rect(0 0 0 0);
@@ -78,14 +79,17 @@ const VideoDetection = () => {
         throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
       }
 
-      const data = await response.json();
+      const job = await response.json();
       
-      if (!data.success) {
-        throw new Error(data.error || "Failed to process video");
+      if (!job.success) {
+        throw new Error(job.error || "Failed to process video");
       }
 
+      // The upload is processed as a background job; poll until it finishes
+      const data = await waitForVideoJob(job.job_id);
+
       setDetectionResults(data);
-      setProcessedVideoUrl(`http://localhost:5000/api/video/processed/${selectedFile.name}`);
+      setProcessedVideoUrl(`http://localhost:5000${data.processed_video_url}`);
     } catch (error) {
       if (error.name === 'AbortError') {
         setError("Request timed out. Please try again with a smaller video file.");
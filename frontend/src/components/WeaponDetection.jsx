@@ -23,7 +23,7 @@ import CloudUploadIcon from '@mui/icons-material/CloudUpload';
 import SecurityIcon from '@mui/icons-material/Security';
 import CheckCircleIcon from '@mui/icons-material/CheckCircle';
 import WarningIcon from '@mui/icons-material/Warning';
-import { detectImage, detectVideo } from '../services/api';
+import { detectImage, detectVideo, waitForVideoJob } from '../services/api';
 import { Chart as ChartJS, CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend } from 'chart.js';
 import { Bar } from 'react-chartjs-2';
 
@@ -106,12 +106,20 @@ function WeaponDetection() {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const data = await response.json();
+            let data = await response.json();
             
             if (!data.success) {
                 throw new Error(data.error || 'Failed to process file');
             }
 
+            // Videos are processed as background jobs; wait for the results
+            if (fileType === 'video' && data.job_id) {
+                data = await waitForVideoJob(data.job_id, (job) => {
+                    setProgress(job.progress);
+                    setProgressMessage(`Processing video... ${job.progress}%`);
+                });
+            }
+
             // Set the processed URL
             if (fileType === 'image' && data.processed_image_url) {
                 setProcessedUrl(`http://localhost:5000${data.processed_image_url}`);
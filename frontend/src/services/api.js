@@ -36,6 +36,24 @@ export const detectImage = async (file) => {
     }
 };
 
+// Detect weapons in several images (or zip archives of images) in one request
+export const detectImageBatch = async (files) => {
+    const formData = new FormData();
+    Array.from(files).forEach((file) => formData.append('files', file));
+
+    try {
+        const response = await api.post('/image/detect/batch', formData, {
+            headers: {
+                'Content-Type': 'multipart/form-data',
+            },
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Error detecting image batch:', error);
+        throw error;
+    }
+};
+
 export const detectVideo = async (file) => {
     const formData = new FormData();
     formData.append('file', file);
@@ -46,9 +64,34 @@ export const detectVideo = async (file) => {
                 'Content-Type': 'multipart/form-data',
             },
         });
-        return response.data;
+        return await waitForVideoJob(response.data.job_id);
     } catch (error) {
         console.error('Error detecting video:', error);
         throw error;
     }
-}; 
\ No newline at end of file
+}; 
+// Poll a queued video job until it finishes and return its results
+export const waitForVideoJob = async (jobId, onProgress, intervalMs = 1000) => {
+    while (true) {
+        const response = await api.get(`/video/jobs/${jobId}`);
+        const job = response.data;
+
+        if (onProgress) {
+            onProgress(job);
+        }
+
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed' || job.status === 'cancelled') {
+            throw new Error(job.error || `Video job ${job.status}`);
+        }
+
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
+export const cancelVideoJob = async (jobId) => {
+    const response = await api.post(`/video/jobs/${jobId}/cancel`);
+    return response.data;
+};